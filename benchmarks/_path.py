@@ -0,0 +1,13 @@
+"""Makes the integration importable from the benchmarks, import it first.
+
+mygregorpy and the other modules are importable on their own, the integration
+as the custom_components.mygregor package.
+"""
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Appended, not prepended: the integration's select.py would shadow the stdlib
+sys.path.append(os.path.join(ROOT, "custom_components", "mygregor"))
+sys.path.append(ROOT)
@@ -0,0 +1,84 @@
+"""Decoding speed of get_devices payloads.
+
+Compares the table-driven decode_device() with the previous chain of
+if "x" in data checks.
+
+    python benchmarks/bench_decoder.py --count 1000
+"""
+import argparse
+import timeit
+
+import _path  # noqa: F401  pylint: disable=unused-import
+
+from fake_cloud import make_fleet
+from mygregorpy import MyGregorDrive, MyGregorStation, decode_device
+
+
+def legacy_decode(data):
+    """Previous MyGregorApi._set_device."""
+    if data["type"] == "Station":
+        device = MyGregorStation(
+            data["id"], data["name"], data["mac"], str(data["model"])
+        )
+    elif data["type"] == "Drive":
+        device = MyGregorDrive(
+            data["id"], data["name"], data["mac"], str(data["model"])
+        )
+    if "hardware_version" in data:
+        device.set_value("hw_version", data["hardware_version"])
+    if "software_version" in data:
+        device.set_value("sw_version", data["software_version"])
+    if "room" in data:
+        device.set_zone(data["room"]["id"], data["room"]["name"])
+    if "power_profile" in data:
+        device.set_value("power_profile", data["power_profile"])
+    if "position" in data:
+        device.set_value("position", data["position"])
+    if "status" in data:
+        device.set_value("state", data["status"])
+    else:
+        device.set_value("state", "Offline")
+    if "sensors_raw" in data:
+        sensors = data["sensors_raw"]
+        if "co2" in sensors:
+            device.set_value("co2", sensors["co2"])
+        if "temperature" in sensors:
+            device.set_value("temperature", sensors["temperature"])
+        if "humidity" in sensors:
+            device.set_value("humidity", sensors["humidity"])
+        if "rssi" in sensors:
+            device.set_value("rssi", sensors["rssi"])
+        if "noise" in sensors:
+            device.set_value("noise", sensors["noise"])
+        if "light" in sensors:
+            device.set_value("luminosity", sensors["light"])
+        if "radiation" in sensors:
+            device.set_value("radiation", sensors["radiation"])
+        if "battery_voltage" in sensors:
+            device.set_value("voltage", sensors["battery_voltage"])
+        if "battery_perc" in sensors:
+            device.set_value("battery_level", sensors["battery_perc"])
+    return device
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    data = make_fleet(args.count)
+    for label, decode in (("legacy", legacy_decode), ("table", decode_device)):
+        elapsed = min(
+            timeit.repeat(
+                lambda: [decode(d) for d in data], number=1, repeat=args.repeat
+            )
+        )
+        print(
+            f"{label:7} {elapsed * 1e3:8.2f} ms per {args.count} devices"
+            f"  {elapsed / args.count * 1e6:6.2f} us/device"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Memory and accessor speed of MyGregor device objects.
+
+Compares the class-level sensor schema with per-instance value lists against
+the previous layout, where every device kept a dict per sensor.
+
+    python benchmarks/bench_devices.py --count 5000
+"""
+import argparse
+import timeit
+import tracemalloc
+
+import _path  # noqa: F401  pylint: disable=unused-import
+
+from mygregorpy import MyGregorDrive, MyGregorStation
+
+
+class DictDevice:
+    """Previous device layout: a dict with title, measurement and value per sensor."""
+
+    def __init__(self, unique_id, device_type, name, mac, model) -> None:
+        self._id = unique_id
+        self._type = device_type
+        self._name = name
+        self._mac = mac
+        self._model = model
+        self._sensors = {}
+        self._zone_name = None
+        self._zone_id = None
+        self.enable_sensor("rssi", "dB", "RSSI")
+        self.enable_sensor("hw_version", "", "Hardware Version")
+        self.enable_sensor("sw_version", "", "Software Version")
+        self.enable_sensor("state", "", "State")
+
+    def enable_sensor(self, sensor, measurement, title=None):
+        self._sensors[sensor] = {
+            "title": title or sensor,
+            "measurement": measurement,
+            "value": None,
+        }
+
+    def get_value(self, sensor):
+        return self._sensors[sensor]["value"]
+
+    def set_value(self, sensor, value):
+        if sensor not in self._sensors:
+            raise Exception(f"Unknown sensor {sensor}")
+        self._sensors[sensor]["value"] = value
+
+    def get_sensors(self, active_only=True):
+        if active_only:
+            result = {}
+            for sensor in self._sensors:
+                if self._sensors[sensor]["value"] is not None:
+                    result[sensor] = self._sensors[sensor]
+            return result
+        return self._sensors
+
+    @property
+    def temperature(self):
+        return self.get_value("temperature")
+
+
+class DictStation(DictDevice):
+    def __init__(self, unique_id, name, mac, model="") -> None:
+        super().__init__(unique_id, "Station", name, mac, model)
+        self.enable_sensor("co2", "ppm", "CO₂")
+        self.enable_sensor("temperature", "℃", "Temperature")
+        self.enable_sensor("humidity", "%", "Humidity")
+        self.enable_sensor("noise", "dBA", "Noise")
+        self.enable_sensor("luminosity", "lx", "Luminosity")
+        self.enable_sensor("radiation", "µSv/h", "Radiation")
+
+
+class DictDrive(DictDevice):
+    def __init__(self, unique_id, name, mac, model="") -> None:
+        super().__init__(unique_id, "Drive", name, mac, model)
+        self.enable_sensor("noise", "dBA", "Noise")
+        self.enable_sensor("voltage", "V", "Battery voltage")
+        self.enable_sensor("battery_level", "%", "Battery level")
+        self.enable_sensor("position", "%", "Position")
+        self.enable_sensor("power_profile", "", "Power Profile")
+
+
+def build(station_cls, drive_cls, count):
+    """Creates count devices, half stations and half drives, with some values."""
+    devices = []
+    for i in range(count):
+        mac = f"aa:bb:cc:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}"
+        if i % 2:
+            device = drive_cls(i, f"Drive {i}", mac, "2")
+            device.set_value("position", i % 101)
+        else:
+            device = station_cls(i, f"Station {i}", mac, "1")
+            device.set_value("temperature", 20.5)
+            device.set_value("co2", 400 + i % 100)
+        device.set_value("state", "Online")
+        devices.append(device)
+    return devices
+
+
+def measure(label, station_cls, drive_cls, count):
+    """Prints memory per device and accessor timings."""
+    tracemalloc.start()
+    devices = build(station_cls, drive_cls, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stations = devices[::2]
+    get_value = timeit.timeit(
+        lambda: [device.get_value("state") for device in devices], number=20
+    )
+    prop = timeit.timeit(lambda: [s.temperature for s in stations], number=20)
+    sensors = timeit.timeit(
+        lambda: [device.get_sensors(active_only=True) for device in devices], number=5
+    )
+    print(
+        f"{label:8} {size / count:8.0f} B/device"
+        f"  get_value {get_value / 20 / count * 1e9:6.0f} ns"
+        f"  property {prop / 20 / len(stations) * 1e9:6.0f} ns"
+        f"  get_sensors {sensors / 5 / count * 1e9:7.0f} ns"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{args.count} devices")
+    measure("dicts", DictStation, DictDrive, args.count)
+    measure("slots", MyGregorStation, MyGregorDrive, args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Fleet-scale poll cycle benchmark against the local fake cloud.
+
+For each fleet size a fake cloud (see fake_cloud.py) is started and poll cycles
+are run with MyGregorApi in two ways:
+
+    per-device  one get_device() per device, as the entities' update() did
+    fleet       one get_devices(include_data=True, include_zone=True) per cycle,
+                as the account coordinator does
+
+Every fetched device is handed to the entities, which count their state
+writes. With --entities stand-in (the default) a small class compares the
+device fingerprints as the entities do, so only the client is measured. With
+--entities real the integration's own station, drive and child sensor
+entities run their _handle_coordinator_update() against a stand-in
+coordinator, with state writes counted instead of sent to Home Assistant.
+That needs Home Assistant installed.
+
+Reported per cycle: requests, state writes, p50/p99 latency, CPU time of the
+client process and peak traced memory of one cycle.
+
+    python benchmarks/bench_fleet.py --sizes 10 100 1000 --latency 0.02
+"""
+import argparse
+import importlib.util
+import time
+import tracemalloc
+
+import _path  # noqa: F401  pylint: disable=unused-import
+
+from fake_cloud import FAKE_TOKEN, FakeCloud
+from mygregorpy import MyGregorApi, MyGregorApiException, RateLimiter
+
+
+class EntityStandIn:
+    """What a station or drive entity does with fresh data."""
+
+    def __init__(self) -> None:
+        self.fingerprint = None
+        self.writes = 0
+
+    def apply(self, device) -> None:
+        """Writes the state only when the device data changed."""
+        fingerprint = device.fingerprint()
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.writes += 1
+
+
+class RealEntities:
+    """The integration's entities of the devices, updated as the coordinator does.
+
+    The coordinator is a stand-in holding the data the entities read, and
+    async_write_ha_state() of every entity only counts the writes.
+    """
+
+    def __init__(self, devices) -> None:
+        # pylint: disable=import-outside-toplevel
+        from custom_components.mygregor import MyGregorRegistry
+        from custom_components.mygregor.cover import _device_drives
+        from custom_components.mygregor.scheduler import PollScheduler
+        from custom_components.mygregor.sensor import _device_sensors
+
+        self.writes = 0
+        self.data = {device.unique_id: device for device in devices}
+        self.last_update_success = True
+        self.stale = False
+        self.scheduler = PollScheduler()
+        registry = MyGregorRegistry(self, list(devices), account=True)
+        self.entities = []
+        for device in devices:
+            for entity in _device_drives(device, registry) + _device_sensors(
+                device, registry
+            ):
+                entity.hass = self
+                entity.async_write_ha_state = self._write
+                if hasattr(entity, "_handle_coordinator_update"):
+                    self.entities.append(entity)
+
+    def _write(self) -> None:
+        """Counts a state write."""
+        self.writes += 1
+
+    def apply(self, devices) -> None:
+        """Sets the fetched devices as coordinator data and updates every entity."""
+        self.data = {
+            device.unique_id: device for device in devices if device is not None
+        }
+        for entity in self.entities:
+            entity._handle_coordinator_update()  # pylint: disable=protected-access
+
+
+def per_device(api, device_ids):
+    """Previous entity update() path: one request per device."""
+    return [api.get_device(device_id, include_data=True) for device_id in device_ids]
+
+
+def fleet(api, device_ids):
+    """Coordinator path: one request for the whole account."""
+    return api.get_devices(include_data=True, include_zone=True)
+
+
+STRATEGIES = {"per-device": per_device, "fleet": fleet}
+
+
+def percentile(values, share):
+    """Returns the value below which the given share (0..1) of values lie."""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def run(cloud, api, strategy, device_ids, cycles, real=False):
+    """Runs poll cycles, returns a dict of results."""
+    if real:
+        real_entities = RealEntities(fleet(api, device_ids))
+        entities = {}
+    else:
+        real_entities = None
+        entities = {device_id: EntityStandIn() for device_id in device_ids}
+    poll = STRATEGIES[strategy]
+    cloud.stats(reset=True)
+
+    latencies = []
+    failures = 0
+    cpu_started = time.process_time()
+    for _ in range(cycles):
+        started = time.perf_counter()
+        try:
+            devices = poll(api, device_ids)
+        except MyGregorApiException:
+            failures += 1
+            devices = []
+        if real_entities is not None:
+            real_entities.apply(devices)
+        for device in devices:
+            if device is not None and device.unique_id in entities:
+                entities[device.unique_id].apply(device)
+        latencies.append(time.perf_counter() - started)
+    cpu = time.process_time() - cpu_started
+    requests = sum(cloud.stats().values())
+    writes = sum(entity.writes for entity in entities.values())
+    if real_entities is not None:
+        writes = real_entities.writes
+
+    tracemalloc.start()
+    poll(api, device_ids)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": requests / cycles,
+        "writes": writes / cycles,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "cpu": cpu / cycles,
+        "peak": peak,
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--offline-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES
+    )
+    parser.add_argument(
+        "--entities",
+        choices=("stand-in", "real"),
+        default="stand-in",
+        help="entities fed with the fetched devices, real needs Home Assistant",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        action="store_true",
+        help="keep the client-side rate limiter (slow for per-device polling)",
+    )
+    args = parser.parse_args()
+
+    if not args.rate_limit:
+        RateLimiter.rate = RateLimiter.burst = 1e9
+    real = args.entities == "real"
+    if real and importlib.util.find_spec("homeassistant") is None:
+        parser.error("--entities real needs Home Assistant installed")
+
+    print(
+        f"{'devices':>7} {'strategy':>10} {'req/cycle':>9} {'writes':>7}"
+        f" {'p50 ms':>8} {'p99 ms':>8} {'cpu ms':>8} {'peak KiB':>9} {'failed':>6}"
+    )
+    for size in args.sizes:
+        with FakeCloud(
+            devices=size,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            offline_rate=args.offline_rate,
+        ) as cloud:
+            api = MyGregorApi(base_url=cloud.url)
+            api.set_access_token(FAKE_TOKEN)
+            device_ids = [device.unique_id for device in api.get_devices()]
+            for strategy in args.strategies:
+                result = run(cloud, api, strategy, device_ids, args.cycles, real)
+                print(
+                    f"{size:7} {strategy:>10} {result['requests']:9.1f}"
+                    f" {result['writes']:7.1f}"
+                    f" {result['p50'] * 1e3:8.1f} {result['p99'] * 1e3:8.1f}"
+                    f" {result['cpu'] * 1e3:8.1f} {result['peak'] / 1024:9.0f}"
+                    f" {result['failures']:6}"
+                )
+            api.close_session()
+
+
+if __name__ == "__main__":
+    main()
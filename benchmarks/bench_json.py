@@ -0,0 +1,54 @@
+"""Decode time of get_devices response bodies per response size.
+
+Compares the previous double parse (once for the error message, once for the
+data), a single parse with json and a single parse with orjson, if installed.
+
+    python benchmarks/bench_json.py --sizes 10 100 1000
+"""
+import argparse
+import json
+import timeit
+
+from fake_cloud import make_fleet
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def double_parse(body):
+    """Previous _exec_request: json.loads(response.text) and response.json()."""
+    text = body.decode()
+    try:
+        json.loads(text)["message"]
+    except (json.JSONDecodeError, KeyError):
+        pass
+    return json.loads(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    decoders = [("double", double_parse), ("json", json.loads)]
+    if orjson is not None:
+        decoders.append(("orjson", orjson.loads))
+    else:
+        print("orjson is not installed")
+
+    for size in args.sizes:
+        body = json.dumps({"devices": make_fleet(size)}).encode()
+        line = f"{size:6} devices {len(body) / 1024:9.1f} KiB"
+        for label, decode in decoders:
+            elapsed = min(
+                timeit.repeat(lambda: decode(body), number=1, repeat=args.repeat)
+            )
+            line += f"  {label} {elapsed * 1e3:8.3f} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Record poll cycles to a cassette and replay them offline.
+
+Recording runs fleet poll cycles (get_devices(include_data=True,
+include_zone=True), as the account coordinator does) against the live cloud
+or the local fake cloud and writes every exchange to a cassette file:
+
+    python benchmarks/bench_replay.py record polls.jsonl --token TOKEN
+    python benchmarks/bench_replay.py record polls.jsonl --fake 1000 --cycles 50
+
+Replaying answers the same cycles from the cassette, at the recorded speed or
+accelerated (--speed 10), or without any delay (--speed 0), so decoder and
+polling changes can be compared on identical traffic:
+
+    python benchmarks/bench_replay.py replay polls.jsonl --speed 0
+
+Reported: cycles, requests, p50/p99 cycle time, CPU time per cycle and the
+number of devices decoded.
+"""
+import argparse
+import time
+
+import _path  # noqa: F401  pylint: disable=unused-import
+
+from fake_cloud import FAKE_TOKEN, FakeCloud
+from mygregorpy import (
+    BASE_URL,
+    CassetteMissException,
+    MyGregorApi,
+    RateLimiter,
+    RecordingTransport,
+    ReplayTransport,
+    RequestsTransport,
+)
+
+
+def percentile(values, share):
+    """Returns the value below which the given share (0..1) of values lie."""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def poll(api, cycles):
+    """Runs fleet poll cycles, returns cycle times, CPU time and devices decoded."""
+    latencies = []
+    decoded = 0
+    cpu_started = time.process_time()
+    for _ in range(cycles):
+        started = time.perf_counter()
+        try:
+            devices = api.get_devices(include_data=True, include_zone=True)
+        except CassetteMissException:
+            break
+        decoded += sum(device is not None for device in devices)
+        latencies.append(time.perf_counter() - started)
+    return latencies, time.process_time() - cpu_started, decoded
+
+
+def report(api, latencies, cpu, decoded):
+    """Prints the results of the cycles run."""
+    if not latencies:
+        print("No cycles completed")
+        return
+    print(
+        f"cycles {len(latencies)}  requests {api.metrics.requests}"
+        f"  p50 {percentile(latencies, 0.5) * 1e3:.1f} ms"
+        f"  p99 {percentile(latencies, 0.99) * 1e3:.1f} ms"
+        f"  cpu {cpu / len(latencies) * 1e3:.2f} ms/cycle"
+        f"  devices {decoded}"
+    )
+
+
+def record(args):
+    """Records poll cycles against the cloud or a fake cloud."""
+    cloud = None
+    url, token = args.url, args.token
+    if args.fake:
+        cloud = FakeCloud(devices=args.fake, latency=args.latency)
+        url, token = cloud.start(), FAKE_TOKEN
+    try:
+        transport = RecordingTransport(RequestsTransport(url), args.cassette)
+        api = MyGregorApi(base_url=url, transport=transport)
+        api.set_access_token(token)
+        report(api, *poll(api, args.cycles))
+        api.close_session()
+        print(f"Recorded {transport.recorded} exchanges to {args.cassette}")
+    finally:
+        if cloud is not None:
+            cloud.stop()
+
+
+def replay(args):
+    """Replays the poll cycles of a cassette."""
+    transport = ReplayTransport(args.cassette, speed=args.speed or None)
+    api = MyGregorApi(transport=transport)
+    api.set_access_token("replayed")
+    report(api, *poll(api, args.cycles))
+    if transport.remaining:
+        print(f"{transport.remaining} recorded exchanges not replayed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recorder = commands.add_parser("record", help="record poll cycles")
+    recorder.add_argument("cassette")
+    recorder.add_argument("--cycles", type=int, default=20)
+    recorder.add_argument("--url", default=BASE_URL)
+    recorder.add_argument("--token", help="access token of the account")
+    recorder.add_argument("--fake", type=int, help="record a fake cloud of N devices")
+    recorder.add_argument("--latency", type=float, default=0.0, help="seconds")
+    recorder.set_defaults(run=record)
+
+    player = commands.add_parser("replay", help="replay a cassette")
+    player.add_argument("cassette")
+    player.add_argument("--cycles", type=int, default=1000000)
+    player.add_argument(
+        "--speed", type=float, default=1.0, help="speed-up factor, 0 for no delay"
+    )
+    player.set_defaults(run=replay)
+
+    args = parser.parse_args()
+    if args.command == "record" and not args.fake and not args.token:
+        parser.error("record needs --token or --fake")
+    if args.command == "replay" or args.fake:
+        # The client-side limiter would pace an accelerated replay
+        RateLimiter.rate = RateLimiter.burst = 1e9
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
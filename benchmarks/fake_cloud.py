@@ -0,0 +1,383 @@
+"""Local stand-in for the MyGregor cloud API.
+
+Serves a synthetic fleet of stations and drives on the endpoints used by the
+integration, with configurable latency and error injection:
+
+    POST /v2/auth
+    GET  /v2/accounts/me
+    GET  /v2/devices, /v2/devices/{id}
+    GET  /v2.1/rooms
+    GET  /v2/rooms/{id}, PUT /v2/rooms/{id}
+
+GET /_stats returns request counts per endpoint, POST /_stats resets them.
+The server runs in its own process, so benchmarks measure only the client.
+fake_transport() serves the same fleet in memory, without HTTP.
+
+    python benchmarks/fake_cloud.py --devices 100 --port 8080
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import multiprocessing
+import random
+import re
+import socket
+import threading
+import time
+from urllib.request import Request, urlopen
+
+FAKE_TOKEN = "fake-token"
+# Drives in the same room per room
+ROOM_SIZE = 4
+# Position change of a moving drive per read
+DRIVE_STEP = 25
+
+
+def make_fleet(count, seed=1):
+    """Synthetic get_devices(include_data=True, include_zone=True) items."""
+    rnd = random.Random(seed)
+    result = []
+    for i in range(count):
+        data = {
+            "id": i,
+            "name": f"Device {i}",
+            "mac": f"aa:bb:cc:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}",
+            "model": 1,
+            "hardware_version": "1.2",
+            "software_version": "3.4.5",
+            "status": "Online",
+            "room": {"id": i // ROOM_SIZE, "name": f"Room {i // ROOM_SIZE}"},
+        }
+        if i % 2:
+            data["type"] = "Drive"
+            data["position"] = rnd.randint(0, 100)
+            data["power_profile"] = "normal"
+            data["sensors_raw"] = {
+                "rssi": -60,
+                "noise": 30,
+                "battery_voltage": 3.9,
+                "battery_perc": 80,
+            }
+        else:
+            data["type"] = "Station"
+            data["sensors_raw"] = {
+                "co2": rnd.randint(400, 1500),
+                "temperature": 21.5,
+                "humidity": 45,
+                "rssi": -55,
+                "noise": 35,
+                "light": 120,
+                "radiation": 0.1,
+            }
+        result.append(data)
+    return result
+
+
+class Fleet:
+    """State of the fake account: devices, rooms and request counters."""
+
+    # Patterns used as counter keys, so IDs do not create new keys
+    ROUTES = (
+        ("/v2/devices/{id}", re.compile(r"^/v2/devices/(\d+)$")),
+        ("/v2/rooms/{id}", re.compile(r"^/v2/rooms/(\d+)$")),
+    )
+
+    def __init__(
+        self, devices, latency, error_rate, rate_limit_rate, offline_rate, seed
+    ):
+        """Create fleet."""
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.devices = {data["id"]: data for data in make_fleet(devices, seed)}
+        for data in self.devices.values():
+            if self._rnd.random() < offline_rate:
+                data["status"] = "Offline"
+        self.rooms = {}
+        for data in self.devices.values():
+            room = data["room"]
+            self.rooms.setdefault(
+                room["id"], {"id": room["id"], "name": room["name"], "state": "auto"}
+            )
+        self.targets = {}
+        self.counts = {}
+
+    def handle(self, method, path, query, body, authorization):
+        """Returns status, body and headers of the response."""
+        if path == "/_stats":
+            with self._lock:
+                if method == "POST":
+                    self.counts = {}
+                return 200, dict(self.counts), {}
+
+        route = path
+        match = None
+        for name, pattern in self.ROUTES:
+            match = pattern.match(path)
+            if match:
+                route = name
+                break
+        with self._lock:
+            key = f"{method} {route}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+            roll = self._rnd.random()
+
+        if self.latency:
+            time.sleep(self.latency)
+        if roll < self.rate_limit_rate:
+            return 429, {"message": "Too many requests"}, {"Retry-After": "1"}
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, {"message": "Injected error"}, {}
+
+        if route == "/v2/auth" and method == "POST":
+            return 200, {"token": FAKE_TOKEN, "token_expires_after": 3600}, {}
+        if authorization != "Bearer " + FAKE_TOKEN:
+            return 401, {"message": "Unauthorized"}, {}
+
+        include = set(filter(None, query.get("include", "").split(",")))
+        with self._lock:
+            if route == "/v2/accounts/me":
+                return 200, {"id": 1, "email": "bench@example.com"}, {}
+            if route == "/v2/devices" and method == "GET":
+                devices = [self._device(i, include) for i in self.devices]
+                return 200, {"devices": devices}, {}
+            if route == "/v2/devices/{id}" and method == "GET":
+                device_id = int(match.group(1))
+                if device_id not in self.devices:
+                    return 404, {"message": "Not found"}, {}
+                return 200, self._device(device_id, include), {}
+            if route == "/v2.1/rooms" and method == "GET":
+                rooms = [self._room(i, include) for i in self.rooms]
+                return 200, {"rooms": rooms}, {}
+            if route == "/v2/rooms/{id}":
+                zone_id = int(match.group(1))
+                if zone_id not in self.rooms:
+                    return 404, {"message": "Not found"}, {}
+                if method == "PUT":
+                    return 200, self._set_room(zone_id, json.loads(body or b"{}")), {}
+                return 200, self._room(zone_id, include), {}
+        return 404, {"message": "Not found"}, {}
+
+    def _device(self, device_id, include):
+        """Returns the device payload, after moving drives and drifting sensors."""
+        data = self.devices[device_id]
+        target = self.targets.get(device_id)
+        if target is not None:
+            step = max(min(target - data["position"], DRIVE_STEP), -DRIVE_STEP)
+            data["position"] += step
+            if data["position"] == target:
+                del self.targets[device_id]
+        if data["type"] == "Station" and self._rnd.random() < 0.5:
+            sensors = data["sensors_raw"]
+            sensors["co2"] = max(400, sensors["co2"] + self._rnd.randint(-20, 20))
+            sensors["temperature"] = round(
+                sensors["temperature"] + self._rnd.choice((-0.1, 0, 0.1)), 1
+            )
+
+        result = {
+            key: value
+            for key, value in data.items()
+            if key not in ("sensors_raw", "position", "status", "room")
+        }
+        if "device_data" in include:
+            for key in ("sensors_raw", "position", "status"):
+                if key in data:
+                    result[key] = data[key]
+        if "room_data" in include:
+            result["room"] = data["room"]
+        return result
+
+    def _room(self, zone_id, include):
+        """Returns the room payload, with its devices when asked for."""
+        result = dict(self.rooms[zone_id])
+        if "image" in include:
+            result["image"] = "data:image/png;base64," + "A" * 20000
+        if "devices" in include:
+            device_include = {"device_data"} if "device_data" in include else set()
+            result["devices"] = [
+                self._device(device_id, device_include)
+                for device_id, data in self.devices.items()
+                if data["room"]["id"] == zone_id
+            ]
+        return result
+
+    def _set_room(self, zone_id, payload):
+        """Sets the room state and starts moving its drives."""
+        state = payload.get("state")
+        self.rooms[zone_id]["state"] = state
+        target = {"open": 100, "close": 0}.get(state)
+        if target is not None:
+            for device_id, data in self.devices.items():
+                if data["room"]["id"] == zone_id and data["type"] == "Drive":
+                    self.targets[device_id] = target
+        return dict(self.rooms[zone_id])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Passes requests to the fleet of the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        """Send headers and body right away, keep-alive plus Nagle adds ~40 ms."""
+        super().setup()
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep quiet."""
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path, _, query = self.path.partition("?")
+        params = dict(part.partition("=")[::2] for part in query.split("&") if part)
+        status, payload, headers = self.server.fleet.handle(
+            method, path, params, body, self.headers.get("Authorization")
+        )
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle("POST")
+
+    def do_PUT(self):  # pylint: disable=invalid-name
+        self._handle("PUT")
+
+
+def fake_transport(
+    devices=100,
+    latency=0.0,
+    error_rate=0.0,
+    rate_limit_rate=0.0,
+    offline_rate=0.0,
+    seed=1,
+    transport_class=None,
+):
+    """Returns a FakeTransport answering from a fleet in this process.
+
+        api = MyGregorApi(transport=fake_transport(devices=100))
+
+    transport_class is the FakeTransport of the mygregorpy module the client
+    is imported from, the top-level mygregorpy by default.
+    """
+    if transport_class is None:
+        # pylint: disable-next=import-outside-toplevel
+        from mygregorpy import FakeTransport as transport_class
+
+    fleet = Fleet(devices, latency, error_rate, rate_limit_rate, offline_rate, seed)
+
+    def handler(method, path, query, data, headers):
+        return fleet.handle(method, path, query, data, headers.get("Authorization"))
+
+    transport = transport_class(handler)
+    transport.fleet = fleet
+    return transport
+
+
+def serve(port, config, ready=None):
+    """Runs the fake cloud until the process is stopped."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.fleet = Fleet(**config)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class FakeCloud:
+    """Runs the fake cloud in a separate process.
+
+        with FakeCloud(devices=100, latency=0.05) as cloud:
+            api = MyGregorApi(base_url=cloud.url)
+    """
+
+    def __init__(
+        self,
+        devices=100,
+        latency=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        offline_rate=0.0,
+        seed=1,
+    ) -> None:
+        """Configure the fleet, latency in seconds and error rates in 0..1."""
+        self._config = {
+            "devices": devices,
+            "latency": latency,
+            "error_rate": error_rate,
+            "rate_limit_rate": rate_limit_rate,
+            "offline_rate": offline_rate,
+            "seed": seed,
+        }
+        self._process = None
+        self.url = None
+
+    def start(self) -> str:
+        """Starts the server on a free port and returns its base URL."""
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=serve, args=(0, self._config, ready), daemon=True
+        )
+        self._process.start()
+        self.url = f"http://127.0.0.1:{ready.get(timeout=10)}"
+        return self.url
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def stats(self, reset=False) -> dict:
+        """Returns request counts per endpoint, optionally resetting them."""
+        request = Request(self.url + "/_stats", method="POST" if reset else "GET")
+        with urlopen(request) as response:
+            return json.loads(response.read())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--offline-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"Serving {args.devices} devices on http://127.0.0.1:{args.port}")
+    print(f"Access token: {FAKE_TOKEN}")
+    serve(
+        args.port,
+        {
+            "devices": args.devices,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "offline_rate": args.offline_rate,
+            "seed": 1,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,23 @@
 """MyGregor Home Assistant Integration."""
 from dataclasses import dataclass
 import logging
+import time
 
 from homeassistant import config_entries, core
 from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.device_registry import format_mac
 
-from .const import DOMAIN
-from .mygregorpy import MyGregorApi
+from .cache import DeviceCache
+from .const import CONF_ACCOUNT, DOMAIN
+from .coordinator import async_get_coordinator, async_release_coordinator
+from .deadband import DEADBANDS, DeadbandFilter, DeadbandStats
+from .discovery import FleetDiscovery, account_entry, owned_device_ids
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = ["cover", "sensor"]
+
 
 async def async_setup_entry(
     hass: core.HomeAssistant, entry: config_entries.ConfigEntry
@@ -18,19 +25,35 @@ async def async_setup_entry(
     """Set up platform from a ConfigEntry."""
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = entry.data
-    hass.data[DOMAIN]["registry"] = {}
+    hass.data[DOMAIN].setdefault("registry", {})
 
-    # Setup connection with devices/cloud
-    api = MyGregorApi()
-    api.set_access_token(entry.data[CONF_ACCESS_TOKEN])
+    # Setup connection with devices/cloud, shared by all entries of the account.
+    # Cached devices are used right away, only the very first setup waits.
+    coordinator = async_get_coordinator(hass, entry.data[CONF_ACCESS_TOKEN])
     _LOGGER.debug("Setting up online MyGregor device")
-    api_device = await hass.async_add_executor_job(
-        api.get_device, entry.data["device_id"], True, True
-    )
-    hass.data[DOMAIN]["registry"][entry.entry_id] = MyGregorRegistry(
-        api,
-        api_device,
-    )
+    if coordinator.data is None and not await coordinator.async_restore():
+        await coordinator.async_config_entry_first_refresh()
+    if entry.data.get(CONF_ACCOUNT):
+        # Devices of device-level entries of the account are left to those
+        owned = owned_device_ids(hass, entry.data[CONF_ACCESS_TOKEN])
+        registry = MyGregorRegistry(
+            coordinator,
+            [
+                device
+                for device_id, device in coordinator.data.items()
+                if device_id not in owned
+            ],
+            account=True,
+        )
+        discovery = FleetDiscovery(hass, entry, registry, len(PLATFORMS))
+        entry.async_on_unload(discovery.async_start())
+    else:
+        api_device = coordinator.data.get(entry.data["device_id"])
+        if api_device is None:
+            raise ConfigEntryNotReady(f"Device {entry.data['device_id']} not found")
+        registry = MyGregorRegistry(coordinator, [api_device])
+    coordinator.entries.add(entry.entry_id)
+    hass.data[DOMAIN]["registry"][entry.entry_id] = registry
 
     # Forward the setup to the cover (driver) platform.
     hass.async_create_task(
@@ -44,37 +67,126 @@ async def async_setup_entry(
     return True
 
 
+async def async_unload_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> bool:
+    """Unload a config entry."""
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        hass.data[DOMAIN]["registry"].pop(entry.entry_id)
+        hass.data[DOMAIN].pop(entry.entry_id)
+        async_release_coordinator(
+            hass, entry.data[CONF_ACCESS_TOKEN], entry.entry_id
+        )
+
+    return unload_ok
+
+
+async def async_remove_entry(
+    hass: core.HomeAssistant, entry: config_entries.ConfigEntry
+) -> None:
+    """Hand the device back to the account entry, delete the cache with the last entry.
+
+    The account entry is reloaded once the removed entry is gone, so it takes
+    over the device of a removed device-level entry.
+    """
+    token = entry.data[CONF_ACCESS_TOKEN]
+    if not entry.data.get(CONF_ACCOUNT):
+        account = account_entry(hass, token)
+        if (
+            account is not None
+            and account.state is config_entries.ConfigEntryState.LOADED
+        ):
+            hass.async_create_task(hass.config_entries.async_reload(account.entry_id))
+    for other in hass.config_entries.async_entries(DOMAIN):
+        if other.entry_id != entry.entry_id and other.data[CONF_ACCESS_TOKEN] == token:
+            return
+    await DeviceCache(hass, token).async_remove()
+
+
 class MyGregorRegistry:
     """Register for sensors and devices."""
 
-    def __init__(self, api, api_devices) -> None:
-        """Create registry."""
+    def __init__(self, coordinator, api_devices, account=False) -> None:
+        """Create registry.
+
+        sensors holds the child sensors by formatted MAC and device class,
+        account is set for entries covering every device of the account.
+        """
         self.sensors = {}
         self.devices = {}
-        self._api = api
+        self.coordinator = coordinator
         self.api_devices = api_devices
+        self.account = account
+        # (create entities of a device, add entities) per platform
+        self.platforms = []
+        self.deadband_stats = DeadbandStats()
+
+    def add_platform(self, create, async_add_entities) -> None:
+        """Register how a platform creates and adds the entities of a device."""
+        self.platforms.append((create, async_add_entities))
 
     @property
     def api(self):
         """Access MyGregor API."""
-        return self._api
+        return self.coordinator.api
 
     def add_sensor(self, device_mac, sensor) -> None:
-        """Add a sensor to the list with unique ID."""
-        _id = format_mac(device_mac) + "_" + sensor.device_class
-        self.sensors[_id] = sensor
+        """Add a sensor to the sensors of the device, with its deadband if any."""
+        sensors = self.sensors.setdefault(format_mac(device_mac), {})
+        sensors[sensor.device_class] = sensor
+        deadband = DEADBANDS.get(sensor.device_class)
+        if deadband is not None:
+            sensor.deadband = DeadbandFilter(deadband)
 
     def get_sensor(self, device_mac, device_class):
         """Returns registered sensor or None if the sensor is not present."""
-        _id = format_mac(device_mac) + "_" + device_class
-        return self.sensors[_id] if _id in self.sensors else None
+        return self.sensors.get(format_mac(device_mac), {}).get(device_class)
 
     def set_sensor_value(self, device_mac, device_class, value):
         """Checks the sensor is registered and changes it's value."""
-        sensor = self.get_sensor(device_mac, device_class)
-        if sensor:
-            if value is None:
-                sensor.set_available(False)
-            else:
-                sensor.set_available(True)
-                sensor.set_value(value)
+        self.set_sensor_values(device_mac, {device_class: value})
+
+    def set_sensor_values(self, device_mac, values) -> None:
+        """Changes the values of the device's sensors and writes them in one go.
+
+        values maps device classes to values, None marks the sensor unavailable.
+        Values within the sensor's deadband are held back (see deadband.py),
+        those sensors only refresh their statistics now and then. Of the others
+        only sensors whose state or attributes changed are written.
+        """
+        sensors = self.sensors.get(format_mac(device_mac))
+        if not sensors:
+            return
+        now = time.monotonic()
+        changed = []
+        for device_class, value in values.items():
+            sensor = sensors.get(device_class)
+            if sensor is None:
+                continue
+            if sensor.deadband is not None:
+                if not sensor.deadband.passes(value, now):
+                    if sensor.refresh_stats(now):
+                        changed.append(sensor)
+                    elif sensor.deadband.held_change:
+                        self.deadband_stats.record(device_class, False)
+                    continue
+                if value is not None:
+                    self.deadband_stats.record(device_class, True)
+            if sensor.apply(value, now):
+                changed.append(sensor)
+        for sensor in changed:
+            if sensor.hass is not None:
+                sensor.async_write_ha_state()
+
+    def remove_sensors(self, device_mac) -> None:
+        """Forget the sensors of a removed device."""
+        self.sensors.pop(format_mac(device_mac), None)
+
+    def rename_sensors(self, device_mac, old_name, new_name) -> None:
+        """Renames the sensors of a device named after it."""
+        for sensor in self.sensors.get(format_mac(device_mac), {}).values():
+            if sensor.name.startswith(old_name):
+                sensor.set_name(new_name + sensor.name[len(old_name) :])
+                if sensor.hass is not None:
+                    sensor.async_write_ha_state()
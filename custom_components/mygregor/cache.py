@@ -0,0 +1,63 @@
+"""On-disk cache of MyGregor device metadata and last readings."""
+from __future__ import annotations
+
+import hashlib
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .mygregorpy import MyGregorDevice, restore_device
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Seconds changes are collected before the cache is written
+SAVE_DELAY = 120
+
+
+class DeviceCache:
+    """Devices of one account as last fetched, kept across restarts.
+
+    Entries are set up from the cache right away, so startup does not wait for
+    the cloud. The file is named after a hash of the access token, the token
+    itself is not written.
+    """
+
+    def __init__(self, hass: HomeAssistant, access_token: str) -> None:
+        """Create cache of the account."""
+        digest = hashlib.sha256(access_token.encode()).hexdigest()[:16]
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.devices.{digest}")
+        self._devices = {}
+
+    async def async_load(self) -> dict[int, MyGregorDevice]:
+        """Returns the cached devices keyed by device ID."""
+        stored = await self._store.async_load()
+        if not stored:
+            return {}
+        devices = {}
+        for data in stored.get("devices", []):
+            try:
+                device = restore_device(data)
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.debug("Skipping cached device %s: %s", data, err)
+                continue
+            if device is not None:
+                devices[device.unique_id] = device
+        return devices
+
+    @callback
+    def async_save(self, devices: dict[int, MyGregorDevice]) -> None:
+        """Schedules writing the devices, the last call within SAVE_DELAY wins."""
+        self._devices = devices
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Returns the data to write."""
+        return {"devices": [device.as_dict() for device in self._devices.values()]}
+
+    async def async_remove(self) -> None:
+        """Deletes the cache file."""
+        await self._store.async_remove()
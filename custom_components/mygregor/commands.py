@@ -0,0 +1,120 @@
+"""Zone command coalescing for MyGregor drives."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .mygregorpy import AsyncMyGregorApi
+
+_LOGGER = logging.getLogger(__name__)
+# Seconds to wait for other commands to the same zone before sending
+COMMAND_DELAY = 0.3
+
+
+class CommandSuperseded(HomeAssistantError):
+    """Another state was requested for the zone before the command was sent."""
+
+
+class ZoneCommand:
+    """A pending state change of one zone and everybody waiting for it."""
+
+    def __init__(self, state: str, future: asyncio.Future) -> None:
+        """Create pending command."""
+        self.state = state
+        self.future = future
+        self.requests = 1
+
+
+class ZoneCommandQueue:
+    """Collects zone state commands over a short window and sends one PUT per zone.
+
+    The API can only set the state of a whole zone, so when an automation opens
+    every drive in a room all of them share a single request. Only requests for
+    the same state are merged. When another state is requested for a zone
+    within the window, the last one wins and the callers waiting for the
+    earlier state get CommandSuperseded, so they do not show a movement that
+    does not happen.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api: AsyncMyGregorApi, delay: float = COMMAND_DELAY
+    ) -> None:
+        """Create command queue."""
+        self._hass = hass
+        self._api = api
+        self._delay = delay
+        self._pending = {}
+        self.requested = 0
+        self.sent = 0
+        self.superseded = 0
+
+    @property
+    def saved(self) -> int:
+        """Number of requests that were merged into another one."""
+        return self.requested - self.sent - self.superseded - self._waiting()
+
+    def _waiting(self) -> int:
+        """Number of requests of the pending commands."""
+        return sum(command.requests for command in self._pending.values())
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a dict."""
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "saved": self.saved,
+            "superseded": self.superseded,
+        }
+
+    async def async_drive_command(self, drive_id: int, state: str):
+        """Sets the state of the drive's zone through the queue.
+
+        The zone is resolved by the API client, see AsyncMyGregorApi.drive_command.
+        """
+        return await self._api.drive_command(
+            drive_id, state, self.async_set_zone_state
+        )
+
+    async def async_set_zone_state(self, zone_id: int, state: str):
+        """Queues the zone state and waits for the shared request to finish."""
+        self.requested += 1
+        command = self._pending.get(zone_id)
+        if command is None:
+            command = ZoneCommand(state, self._hass.loop.create_future())
+            self._pending[zone_id] = command
+            self._hass.async_create_task(self._async_send(zone_id))
+        elif command.state == state:
+            command.requests += 1
+        else:
+            # The send task takes whatever command is pending when it wakes up
+            self.superseded += command.requests
+            command.future.set_exception(
+                CommandSuperseded(
+                    f"Zone {zone_id} set to {state} before {command.state} was sent"
+                )
+            )
+            command = ZoneCommand(state, self._hass.loop.create_future())
+            self._pending[zone_id] = command
+        return await asyncio.shield(command.future)
+
+    async def _async_send(self, zone_id: int) -> None:
+        """Sends the pending command of the zone after the collecting window."""
+        await asyncio.sleep(self._delay)
+        command = self._pending.pop(zone_id)
+        self.sent += 1
+        _LOGGER.debug(
+            "Setting zone %s to %s for %s request(s), %s saved so far",
+            zone_id,
+            command.state,
+            command.requests,
+            self.saved,
+        )
+        try:
+            result = await self._api.set_zone_state(zone_id, command.state)
+        except Exception as err:  # pylint: disable=broad-except
+            command.future.set_exception(err)
+        else:
+            command.future.set_result(result)
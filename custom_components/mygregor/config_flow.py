@@ -7,23 +7,26 @@ from typing import Any
 from homeassistant.data_entry_flow import FlowResult
 
 from .mygregorpy import (
-    MyGregorApi,
+    AsyncMyGregorApi,
     UnauthorizedException,
 )
 from homeassistant import config_entries, core
 from homeassistant.const import CONF_ACCESS_TOKEN, CONF_MAC
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 
-from .const import DOMAIN
+from .const import CONF_ACCOUNT, DOMAIN
+from .discovery import account_entry
 
 _LOGGER = logging.getLogger(__name__)
 
 AUTH_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_ACCESS_TOKEN): cv.string,
-        vol.Required(CONF_MAC): cv.string,
+        # Without a MAC address the entry covers every device of the account
+        vol.Optional(CONF_MAC): cv.string,
     }
 )
 
@@ -34,24 +37,26 @@ async def validate_auth(access_token: str, hass: core.HomeAssistant):
     Raises a ValueError if the auth token is invalid.
     """
     # Setup connection with devices/cloud
-    hub = MyGregorApi()
+    hub = AsyncMyGregorApi(async_get_clientsession(hass))
     hub.set_access_token(access_token)
 
     # Verify that passed in configuration works
     try:
-        await hass.async_add_executor_job(hub.my_account)
+        account = await hub.my_account()
     except UnauthorizedException as err:
         raise ValueError from err
 
-    return hub
+    return hub, account
 
 
-async def validate_device(mac: str, hub: MyGregorApi, hass: core.HomeAssistant):
+async def validate_device(
+    mac: str, hub: AsyncMyGregorApi, hass: core.HomeAssistant
+):
     """Validate user's device MAC address.
 
     Raises a ValueError if the device is not available."""
     found = None
-    devices = await hass.async_add_executor_job(hub.get_devices)
+    devices = await hub.get_devices()
     if devices is None:
         raise ValueError("No devices found")
     for device in devices:
@@ -76,13 +81,22 @@ class MyGregorHassConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
         if user_input is not None:
             try:
-                hub = await validate_auth(user_input[CONF_ACCESS_TOKEN], self.hass)
+                hub, account = await validate_auth(
+                    user_input[CONF_ACCESS_TOKEN], self.hass
+                )
             except ValueError:
                 errors["base"] = "auth"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
+                if not user_input.get(CONF_MAC):
+                    return await self._async_create_account_entry(
+                        user_input[CONF_ACCESS_TOKEN], account
+                    )
+                if account_entry(self.hass, user_input[CONF_ACCESS_TOKEN]) is not None:
+                    # Its devices are already set up by the account entry
+                    return self.async_abort(reason="account_configured")
                 await self.async_set_unique_id(user_input[CONF_MAC])
                 self._abort_if_unique_id_configured({CONF_MAC: user_input[CONF_MAC]})
                 try:
@@ -104,3 +118,18 @@ class MyGregorHassConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id="user", data_schema=AUTH_SCHEMA, errors=errors
         )
+
+    async def _async_create_account_entry(
+        self, access_token: str, account
+    ) -> FlowResult:
+        """Creates an entry for all devices of the account, found on every poll."""
+        if not isinstance(account, dict):
+            account = {}
+        if account.get("id") is not None:
+            await self.async_set_unique_id(f"account_{account['id']}")
+            self._abort_if_unique_id_configured({CONF_ACCESS_TOKEN: access_token})
+        title = account.get("email")
+        return self.async_create_entry(
+            title=title or "MyGregor account",
+            data={CONF_ACCESS_TOKEN: access_token, CONF_ACCOUNT: True},
+        )
@@ -2,9 +2,14 @@
 
 DOMAIN = "mygregor"
 
+# Config entry data flag of entries covering all devices of the account
+CONF_ACCOUNT = "account"
+
 ATTR_RSSI = "rssi"
 ATTR_NOISE = "noise"
 ATTR_LUMINOSITY = "luminosity"
 ATTR_RADIATION = "radiation"
 ATTR_HW_VER = "hardware_version"
 ATTR_MAC = "mac"
+ATTR_STALE = "stale"
+ATTR_ETA = "eta"
@@ -0,0 +1,272 @@
+"""Account-wide data update coordinator for MyGregor devices."""
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .cache import DeviceCache
+from .commands import ZoneCommandQueue
+from .const import DOMAIN
+from .mygregorpy import (
+    AsyncMyGregorApi,
+    CircuitOpenException,
+    NotFoundException,
+    ServerErrorException,
+    UnauthorizedException,
+)
+from .scheduler import DUE_TOLERANCE, SLOW_INTERVAL, PollScheduler
+
+_LOGGER = logging.getLogger(__name__)
+# Time between updating data from api.mygregor.com
+UPDATE_INTERVAL = timedelta(seconds=SLOW_INTERVAL)
+# More requests than this are replaced with one request for the whole fleet
+FLEET_THRESHOLD = 3
+# Expected drive positions after a zone command
+COMMAND_TARGETS = {"open": 100, "close": 0}
+
+
+class MyGregorCoordinator(DataUpdateCoordinator):
+    """Fetches all devices of an account with a single request per interval.
+
+    One coordinator is shared by every config entry using the same access token.
+    The data is a dict of MyGregorDevice objects keyed by device ID.
+
+    Between the fleet polls drives moving after a command are polled on their
+    own schedule (see PollScheduler), the refresh interval is adjusted after
+    every update to the next device due. Those are fetched with one request per
+    zone when their zone is known, so the refresh after a zone command only asks
+    for that zone.
+
+    When the cloud is unreachable (open circuit breaker or errors left after the
+    retries) the last good data is kept and marked stale instead of failing.
+    After a restart the devices are taken from the on-disk cache, also marked
+    stale, until the first fetch in the background replaces them.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api: AsyncMyGregorApi, cache: DeviceCache
+    ) -> None:
+        """Initialize coordinator."""
+        super().__init__(
+            hass, _LOGGER, name=DOMAIN, update_interval=UPDATE_INTERVAL
+        )
+        self.api = api
+        self.cache = cache
+        self.commands = ZoneCommandQueue(hass, api)
+        self.scheduler = PollScheduler()
+        self.entries = set()
+        self.stale = False
+        # Zone polls leave out the room image, the largest part of the response
+        self.zone_image = False
+        # Monotonic time of the last poll of the whole fleet
+        self._fleet_polled_at = None
+        self._outage_errors = (
+            CircuitOpenException,
+            ServerErrorException,
+        ) + api.TRANSIENT_ERRORS
+
+    async def async_restore(self) -> bool:
+        """Starts with the cached devices and fetches fresh ones in the background.
+
+        Returns False when there is nothing cached, the caller has to fetch.
+        """
+        devices = await self.cache.async_load()
+        if self.data is not None:
+            # Another entry of the account got here first
+            return True
+        if not devices:
+            return False
+        _LOGGER.debug("Starting with %s cached devices", len(devices))
+        self.data = devices
+        self.stale = True
+        self.hass.async_create_task(self.async_refresh())
+        return True
+
+    async def async_command_sent(self, drive_id: int, state: str) -> None:
+        """Polls the drives of the commanded zone until they settle.
+
+        Drives without a learned speed are polled fast right away, otherwise
+        the next refresh is moved to the confirming poll the scheduler planned.
+        """
+        zone_id = self.api.zone_of(drive_id)
+        commanded = set()
+        for device in (self.data or {}).values():
+            if device.unique_id == drive_id or (
+                zone_id is not None
+                and device.zone_id == zone_id
+                and device.device_type == "Drive"
+            ):
+                self.scheduler.command_sent(
+                    device.unique_id, COMMAND_TARGETS.get(state)
+                )
+                commanded.add(device.unique_id)
+        if commanded.intersection(self.scheduler.due()):
+            await self.async_request_refresh()
+            return
+        self._set_update_interval()
+        if self._listeners:
+            self._schedule_refresh()
+
+    async def _async_update_data(self):
+        """Fetch the devices which are due from api.mygregor.com."""
+        due = self.scheduler.due()
+        try:
+            plan = None
+            if (
+                self.data is not None
+                and not self.stale
+                and self._fleet_age() < SLOW_INTERVAL - DUE_TOLERANCE
+            ):
+                if not due:
+                    # The timer fired before the device it was set for is due
+                    self._set_update_interval()
+                    return self.data
+                if set(self.scheduler.moving()).issuperset(due):
+                    plan = self._partial_poll(due)
+            if plan is not None:
+                try:
+                    data = await self._async_fetch_zones(*plan)
+                except NotFoundException:
+                    # A device polled alone was removed from the account
+                    plan = None
+            if plan is None:
+                data = await self._async_fetch_fleet()
+        except UnauthorizedException as err:
+            raise ConfigEntryAuthFailed(err) from err
+        except self._outage_errors as err:
+            if self.data is None:
+                raise UpdateFailed(f"Error communicating with API: {err}") from err
+            if not self.stale:
+                _LOGGER.warning("Cloud unavailable, serving last known data: %s", err)
+            self.stale = True
+            self.update_interval = timedelta(
+                seconds=max(self.api.circuit_breaker.retry_in(), SLOW_INTERVAL)
+            )
+            return self.data
+        except Exception as err:  # pylint: disable=broad-except
+            raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+        if self.stale:
+            _LOGGER.info("Cloud available again")
+        self.stale = False
+        self._set_update_interval()
+        self.cache.async_save(data)
+        return data
+
+    def _set_update_interval(self) -> None:
+        """Sets the refresh interval to the next device due or fleet poll."""
+        delay = min(self.scheduler.next_delay(), SLOW_INTERVAL - self._fleet_age())
+        self.update_interval = timedelta(seconds=max(delay, 1))
+
+    def _fleet_age(self) -> float:
+        """Seconds since the whole fleet was polled, infinite before the first poll.
+
+        The fleet is polled at least every SLOW_INTERVAL even when only devices
+        polled alone are due, so new and removed devices are noticed.
+        """
+        if self._fleet_polled_at is None:
+            return float("inf")
+        return time.monotonic() - self._fleet_polled_at
+
+    async def _async_fetch_fleet(self):
+        """Fetch all devices of the account with one request."""
+        devices = await self.api.get_devices(include_data=True, include_zone=True)
+        self._fleet_polled_at = time.monotonic()
+        data = {}
+        for device in devices:
+            self.scheduler.observe(device)
+            data[device.unique_id] = device
+        for device_id in set(self.data or {}) - set(data):
+            self.scheduler.forget(device_id)
+        return data
+
+    def _partial_poll(self, device_ids):
+        """Returns the zones and the single devices to poll for the due devices.
+
+        Devices with a known zone are polled with one request for their zone,
+        which also updates every other device in it. Returns None when there
+        would be more requests than FLEET_THRESHOLD.
+        """
+        zones = {}
+        singles = []
+        for device_id in device_ids:
+            device = self.data.get(device_id)
+            if device is not None and device.zone_id is not None:
+                zones.setdefault(device.zone_id, set()).add(device_id)
+            else:
+                singles.append(device_id)
+        if len(zones) + len(singles) > FLEET_THRESHOLD:
+            return None
+        return zones, singles
+
+    async def _async_fetch_zones(self, zones, device_ids):
+        """Fetch the given zones with one request each, then the single devices.
+
+        Due devices which are no longer in their zone are fetched on their own.
+        """
+        data = dict(self.data)
+        device_ids = list(device_ids)
+        for zone_id, zone_device_ids in zones.items():
+            _LOGGER.debug("Polling zone %s for devices %s", zone_id, zone_device_ids)
+            try:
+                devices = await self.api.get_zone_devices(
+                    zone_id, include_image=self.zone_image
+                )
+            except NotFoundException:
+                devices = []
+            for device in devices:
+                self.scheduler.observe(device)
+                data[device.unique_id] = device
+            for device_id in zone_device_ids - {device.unique_id for device in devices}:
+                self.api.forget_zone(device_id)
+                device_ids.append(device_id)
+        data.update(await self._async_fetch_devices(device_ids))
+        return data
+
+    async def _async_fetch_devices(self, device_ids):
+        """Fetch only the given devices, one request each."""
+        data = {}
+        if device_ids:
+            _LOGGER.debug("Polling devices %s on their own", device_ids)
+        for device_id in device_ids:
+            device = await self.api.get_device(
+                device_id, include_data=True, include_zone=True
+            )
+            if device is None:
+                continue
+            self.scheduler.observe(device)
+            data[device_id] = device
+        return data
+
+
+def async_get_coordinator(
+    hass: HomeAssistant, access_token: str
+) -> MyGregorCoordinator:
+    """Returns the coordinator for the access token, creating it if needed."""
+    coordinators = hass.data[DOMAIN].setdefault("coordinators", {})
+    if access_token not in coordinators:
+        api = AsyncMyGregorApi(async_get_clientsession(hass))
+        api.set_access_token(access_token)
+        coordinators[access_token] = MyGregorCoordinator(
+            hass, api, DeviceCache(hass, access_token)
+        )
+    return coordinators[access_token]
+
+
+def async_release_coordinator(
+    hass: HomeAssistant, access_token: str, entry_id: str
+) -> None:
+    """Detach a config entry and drop the coordinator when nobody uses it."""
+    coordinators = hass.data[DOMAIN].get("coordinators", {})
+    coordinator = coordinators.get(access_token)
+    if coordinator is None:
+        return
+    coordinator.entries.discard(entry_id)
+    if not coordinator.entries:
+        coordinators.pop(access_token)
@@ -1,6 +1,7 @@
 """MyGregor drive integration for Home Assistant."""
 from __future__ import annotations
 
+from datetime import timedelta
 import logging
 
 from homeassistant.components.cover import (
@@ -19,13 +20,17 @@ from homeassistant.const import (
     DEVICE_CLASS_SIGNAL_STRENGTH,
     ATTR_BATTERY_LEVEL,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import format_mac
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN, ATTR_HW_VER, ATTR_NOISE
+from .const import DOMAIN, ATTR_ETA, ATTR_HW_VER, ATTR_NOISE
 from .entity import MyGregorDevice
 
 _LOGGER = logging.getLogger(__name__)
+# Seconds between estimated position updates of a moving drive
+MOTION_REFRESH = 2
 
 
 async def async_setup_entry(
@@ -36,19 +41,24 @@ async def async_setup_entry(
     """Setup sensors from a config entry created in the integrations UI."""
 
     registry = hass.data[DOMAIN]["registry"][config_entry.entry_id]
-    api_devices = [registry.api_devices]
     drives = []
-    for device in api_devices:
-        if device.device_type == "Drive":
-            drive = MyGregorDrive(device, registry)
-            drives += [drive]
+    for device in registry.api_devices:
+        drives += _device_drives(device, registry)
 
+    registry.add_platform(_device_drives, async_add_entities)
     if not drives:
         return
 
     async_add_entities(drives)
 
 
+def _device_drives(device, registry) -> list:
+    """Creates the cover entity of a drive."""
+    if device.device_type == "Drive":
+        return [MyGregorDrive(device, registry)]
+    return []
+
+
 class MyGregorDrive(MyGregorDevice, CoverEntity):
     """Representation of a MyGregor drive."""
 
@@ -57,9 +67,7 @@ class MyGregorDrive(MyGregorDevice, CoverEntity):
 
     def __init__(self, device, registry) -> None:
         """Initialize drive."""
-        super().__init__(device)
-        self.registry = registry
-        self._id = int(device.unique_id)
+        super().__init__(device, registry)
         self._unique_id = "MyGregorDrive_" + format_mac(device.mac)
         if device.state == "Online":
             self._available = True
@@ -74,6 +82,7 @@ class MyGregorDrive(MyGregorDevice, CoverEntity):
         self.extra_attrs[ATTR_SW_VERSION] = device.software_version
         self.extra_attrs[DEVICE_CLASS_SIGNAL_STRENGTH] = device.rssi
         self.extra_attrs[DEVICE_CLASS_SIGNAL_STRENGTH] = device.battery_level
+        self._motion_timer = None
 
     @property
     def device_info(self):
@@ -112,11 +121,15 @@ class MyGregorDrive(MyGregorDevice, CoverEntity):
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self._available
+        return self._available and self.coordinator.last_update_success
 
     @property
     def current_cover_position(self):
         """The current position of cover where 0 means closed and 100 is fully open. Required with SUPPORT_SET_POSITION."""
+        if self._state in (STATE_OPENING, STATE_CLOSING):
+            estimate = self.coordinator.scheduler.estimate(self._id)
+            if estimate is not None:
+                return estimate[0]
         return self._curr_pos
 
     @property
@@ -140,47 +153,97 @@ class MyGregorDrive(MyGregorDevice, CoverEntity):
         """Flag supported features."""
         return self._supported_features
 
-    def open_cover(self, **kwargs):
+    async def async_open_cover(self, **kwargs):
         """Open the cover."""
-        self.registry.api.open(self._id)
+        await self.coordinator.commands.async_drive_command(self._id, "open")
         if self._curr_pos == 100:
             self._state = STATE_OPEN
         else:
             self._state = STATE_OPENING
+        await self.coordinator.async_command_sent(self._id, "open")
+        self._track_motion()
+        self.async_write_ha_state()
 
-    def close_cover(self, **kwargs):
+    async def async_close_cover(self, **kwargs):
         """Close cover."""
-        self.registry.api.close(self._id)
+        await self.coordinator.commands.async_drive_command(self._id, "close")
         if not self._curr_pos:
             self._state = STATE_CLOSED
         else:
             self._state = STATE_CLOSING
-
-    def update(self) -> None:
-        """Fetch new state data for this device.
-
-        This is the only method that should fetch new data for Home Assistant.
+        await self.coordinator.async_command_sent(self._id, "close")
+        self._track_motion()
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop the position estimates."""
+        await super().async_will_remove_from_hass()
+        if self._motion_timer is not None:
+            self._motion_timer()
+            self._motion_timer = None
+
+    def _track_motion(self) -> None:
+        """Show the expected end of the movement and update the estimated position.
+
+        Uses the speed the scheduler learned for the drive, without it only the
+        polled positions are shown.
         """
-        device = self.registry.api.get_device(
-            self._id, include_data=True, include_zone=False
-        )
+        estimate = None
+        if self._state in (STATE_OPENING, STATE_CLOSING):
+            estimate = self.coordinator.scheduler.estimate(self._id)
+        if estimate is None:
+            self.extra_attrs.pop(ATTR_ETA, None)
+            return
+        self.extra_attrs[ATTR_ETA] = (
+            dt_util.utcnow() + timedelta(seconds=round(estimate[1]))
+        ).isoformat()
+        if self._motion_timer is None and estimate[1] > 0:
+            self._motion_timer = async_call_later(
+                self.hass, MOTION_REFRESH, self._async_motion_tick
+            )
+
+    @callback
+    def _async_motion_tick(self, _now) -> None:
+        """Write the estimated position, no request is sent."""
+        self._motion_timer = None
+        if self._state not in (STATE_OPENING, STATE_CLOSING):
+            return
+        estimate = self.coordinator.scheduler.estimate(self._id)
+        if estimate is None:
+            return
+        self.async_write_ha_state()
+        if estimate[1] > 0:
+            self._motion_timer = async_call_later(
+                self.hass, MOTION_REFRESH, self._async_motion_tick
+            )
+
+    def _state_fingerprint(self):
+        """Opening/closing ends when the scheduler considers the drive settled."""
+        return self.coordinator.scheduler.is_moving(self._id)
+
+    def _set_device(self, device) -> None:
+        """Apply the state data fetched by the coordinator for this device."""
         self.extra_attrs[ATTR_HW_VER] = device.hardware_version
         self.extra_attrs[ATTR_SW_VERSION] = device.software_version
         self.extra_attrs[DEVICE_CLASS_SIGNAL_STRENGTH] = device.rssi
         self.extra_attrs[ATTR_BATTERY_LEVEL] = device.battery_level
 
         self._curr_pos = device.position
-        if not device.position:
+        if self.coordinator.scheduler.is_moving(self._id) and self._state in (
+            STATE_OPENING,
+            STATE_CLOSING,
+        ):
+            pass  # still moving after a command
+        elif not device.position:
             self._state = STATE_CLOSED
         else:
             self._state = STATE_OPEN
+        self._track_motion()
 
-        mac = self.device.mac
+        values = {ATTR_NOISE: device.noise, "position": device.position}
         if device.state == "Online":
             self._available = True
-            self.registry.set_sensor_value(mac, ATTR_NOISE, device.noise)
-            self.registry.set_sensor_value(mac, "position", device.position)
         else:
             self._available = False
-            self.registry.set_sensor_value(mac, ATTR_NOISE, None)
-            self.registry.set_sensor_value(mac, "position", None)
+            values = dict.fromkeys(values)
+        self.registry.set_sensor_values(self.device.mac, values)
@@ -0,0 +1,131 @@
+"""Deadbands holding back insignificant changes of MyGregor sensor readings."""
+from __future__ import annotations
+
+from homeassistant.const import (
+    DEVICE_CLASS_CO2,
+    DEVICE_CLASS_HUMIDITY,
+    DEVICE_CLASS_ILLUMINANCE,
+    DEVICE_CLASS_TEMPERATURE,
+)
+
+from .const import ATTR_NOISE, ATTR_RADIATION
+
+# Seconds a held back value waits at most before it is written anyway
+HEARTBEAT = 900
+# Rounding error allowed, so 21.5 -> 21.4 counts as a change of 0.1
+TOLERANCE = 1e-9
+
+
+class Deadband:
+    """Smallest change of a reading worth a state write.
+
+    A change is significant when it reaches the absolute threshold and the
+    relative one (share of the last written value), whichever are set.
+    """
+
+    __slots__ = ("absolute", "relative", "heartbeat")
+
+    def __init__(
+        self,
+        absolute: float = 0.0,
+        relative: float = 0.0,
+        heartbeat: float = HEARTBEAT,
+    ) -> None:
+        """Create deadband, heartbeat is the longest silence in seconds."""
+        self.absolute = absolute
+        self.relative = relative
+        self.heartbeat = heartbeat
+
+    def significant(self, last, value) -> bool:
+        """True if value differs enough from the last written value."""
+        try:
+            change = abs(value - last)
+        except TypeError:
+            return value != last
+        threshold = max(self.absolute, self.relative * abs(last))
+        return change > 0 and change + TOLERANCE >= threshold
+
+
+# Deadband per sensor device class, sensors not listed write every change
+DEADBANDS = {
+    DEVICE_CLASS_TEMPERATURE: Deadband(absolute=0.1),
+    DEVICE_CLASS_HUMIDITY: Deadband(absolute=1),
+    DEVICE_CLASS_CO2: Deadband(absolute=20, relative=0.02),
+    DEVICE_CLASS_ILLUMINANCE: Deadband(absolute=5, relative=0.1),
+    ATTR_NOISE: Deadband(absolute=2),
+    ATTR_RADIATION: Deadband(absolute=0.02),
+}
+
+
+class DeadbandFilter:
+    """Passes the significant readings of one sensor.
+
+    Readings are compared with the last one passed, not the last one received,
+    so a slow drift is written once it adds up. None (unavailable) always
+    passes and lets the next reading through.
+
+    held_change is set when a reading is held back that differs from the one
+    received before it, i.e. a write was saved. The same reading passed again
+    does not count twice.
+    """
+
+    __slots__ = ("deadband", "value", "passed_at", "received", "held_change")
+
+    def __init__(self, deadband: Deadband) -> None:
+        """Create filter of one sensor."""
+        self.deadband = deadband
+        self.value = None
+        self.passed_at = None
+        self.received = None
+        self.held_change = False
+
+    def passes(self, value, now: float) -> bool:
+        """True if the reading taken at monotonic time now has to be written."""
+        changed = value != self.received
+        self.received = value
+        self.held_change = False
+        if value is None:
+            self.passed_at = None
+            return True
+        if (
+            self.passed_at is None
+            or now - self.passed_at >= self.deadband.heartbeat
+            or self.deadband.significant(self.value, value)
+        ):
+            self.value = value
+            self.passed_at = now
+            return True
+        self.held_change = changed
+        return False
+
+
+class DeadbandStats:
+    """Counts readings passed to the sensors and writes held back, per device class."""
+
+    def __init__(self) -> None:
+        """Start with empty counters."""
+        self.passed = {}
+        self.suppressed = {}
+
+    def record(self, device_class: str, passed: bool) -> None:
+        """Record one reading."""
+        counts = self.passed if passed else self.suppressed
+        counts[device_class] = counts.get(device_class, 0) + 1
+
+    def as_dict(self) -> dict:
+        """Returns totals and the counters per device class."""
+        passed = sum(self.passed.values())
+        suppressed = sum(self.suppressed.values())
+        total = passed + suppressed
+        return {
+            "passed": passed,
+            "suppressed": suppressed,
+            "suppressed_rate": round(suppressed / total, 3) if total else 0.0,
+            "sensors": {
+                device_class: {
+                    "passed": self.passed.get(device_class, 0),
+                    "suppressed": self.suppressed.get(device_class, 0),
+                }
+                for device_class in sorted(self.passed.keys() | self.suppressed.keys())
+            },
+        }
@@ -0,0 +1,55 @@
+"""Diagnostics support for MyGregor."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_ACCESS_TOKEN, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    The API counters belong to the account, so entries sharing an access token
+    report the same numbers.
+    """
+    registry = hass.data[DOMAIN]["registry"][entry.entry_id]
+    coordinator = registry.coordinator
+    api = coordinator.api
+    breaker = api.circuit_breaker
+    limiter = api.rate_limiter
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "coordinator": {
+            "entries": len(coordinator.entries),
+            "devices": len(coordinator.data or {}),
+            "last_update_success": coordinator.last_update_success,
+            "stale": coordinator.stale,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "moving": coordinator.scheduler.moving(),
+            "offline": coordinator.scheduler.offline(),
+        },
+        "api": api.metrics.as_dict(),
+        "single_flight": api.single_flight.as_dict(),
+        "cache": {"entries": len(api.cache), **api.cache.stats.as_dict()},
+        "commands": coordinator.commands.as_dict(),
+        "deadbands": registry.deadband_stats.as_dict(),
+        "rate_limiter": {
+            "throttled": limiter.throttled,
+            "rate_limited": limiter.rate_limited,
+        }
+        if limiter is not None
+        else None,
+        "circuit_breaker": {
+            "open": breaker.is_open,
+            "retry_in": round(breaker.retry_in(), 1),
+        },
+    }
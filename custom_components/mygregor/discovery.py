@@ -0,0 +1,155 @@
+"""Device discovery for account-level MyGregor config entries."""
+from __future__ import annotations
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+
+from .const import CONF_ACCOUNT, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def owned_device_ids(hass: HomeAssistant, access_token: str) -> set[int]:
+    """IDs of the devices set up by device-level entries of the account."""
+    return {
+        entry.data["device_id"]
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.data.get(CONF_ACCESS_TOKEN) == access_token
+        and "device_id" in entry.data
+    }
+
+
+def account_entry(hass: HomeAssistant, access_token: str) -> ConfigEntry | None:
+    """The account-level entry of the access token, None if there is none."""
+    return next(
+        (
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.data.get(CONF_ACCESS_TOKEN) == access_token
+            and entry.data.get(CONF_ACCOUNT)
+        ),
+        None,
+    )
+
+
+class FleetDiscovery:
+    """Keeps the entities of an account-level entry in line with the account.
+
+    After every coordinator update the fetched device IDs are compared with the
+    known ones: new devices get their entities, removed devices are taken out
+    of the device registry (with their entities), and renamed or moved devices
+    are updated in place. Only the changes cause work, the entry is never
+    reloaded. Stale data (cache or outage) is not compared, so an unreachable
+    cloud does not look like an empty account.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, registry, platforms: int
+    ) -> None:
+        """Create discovery for the entry and its registry.
+
+        Nothing is compared before all platforms registered their entity factory.
+        """
+        self._hass = hass
+        self._entry = entry
+        self._registry = registry
+        self._platforms = platforms
+        # Device ID -> (name, zone name) of the devices seen so far
+        self._known = {
+            device.unique_id: (device.name, device.zone_name)
+            for device in registry.api_devices
+        }
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Starts listening to the coordinator, returns the function to stop it."""
+        return self._registry.coordinator.async_add_listener(self._async_update)
+
+    @callback
+    def _async_update(self) -> None:
+        """Compare the fetched devices with the known ones."""
+        coordinator = self._registry.coordinator
+        if (
+            coordinator.data is None
+            or coordinator.stale
+            or len(self._registry.platforms) < self._platforms
+        ):
+            return
+        data = coordinator.data
+        known = self._known
+
+        added = data.keys() - known.keys()
+        if added:
+            owned = owned_device_ids(self._hass, self._entry.data[CONF_ACCESS_TOKEN])
+            for device_id in added:
+                device = data[device_id]
+                known[device_id] = (device.name, device.zone_name)
+                if device_id not in owned:
+                    self._async_add(device)
+
+        for device_id in known.keys() - data.keys():
+            self._async_remove(device_id)
+            del known[device_id]
+
+        for device_id, device in data.items():
+            name, zone_name = known[device_id]
+            if device.name != name or device.zone_name != zone_name:
+                known[device_id] = (device.name, device.zone_name)
+                self._async_changed(device, name)
+
+    @callback
+    def _async_add(self, device) -> None:
+        """Creates the entities of a new device on every platform."""
+        _LOGGER.info("Adding new MyGregor %s %s", device.device_type, device.name)
+        self._registry.api_devices.append(device)
+        for create, async_add_entities in self._registry.platforms:
+            entities = create(device, self._registry)
+            if entities:
+                async_add_entities(entities)
+
+    @callback
+    def _async_remove(self, device_id: int) -> None:
+        """Removes a device which is no longer in the account."""
+        registry = self._registry
+        device = next(
+            (d for d in registry.api_devices if d.unique_id == device_id), None
+        )
+        if device is None:
+            # Owned by a device-level entry
+            return
+        _LOGGER.info("Removing MyGregor %s %s", device.device_type, device.name)
+        registry.api_devices.remove(device)
+        registry.remove_sensors(device.mac)
+        device_registry = dr.async_get(self._hass)
+        device_entry = device_registry.async_get_device(
+            set(), {(dr.CONNECTION_NETWORK_MAC, device.mac)}
+        )
+        if device_entry is not None:
+            device_registry.async_update_device(
+                device_entry.id, remove_config_entry_id=self._entry.entry_id
+            )
+
+    @callback
+    def _async_changed(self, device, old_name: str) -> None:
+        """Applies a new name or zone of a device.
+
+        The entities take the new device data with the running update. A new
+        zone only sets the area of devices which have none yet, the user's own
+        area assignment is kept.
+        """
+        registry = self._registry
+        if device.name != old_name:
+            _LOGGER.info("MyGregor device %s renamed to %s", old_name, device.name)
+            registry.rename_sensors(device.mac, old_name, device.name)
+        device_registry = dr.async_get(self._hass)
+        device_entry = device_registry.async_get_device(
+            set(), {(dr.CONNECTION_NETWORK_MAC, device.mac)}
+        )
+        if device_entry is not None:
+            device_registry.async_update_device(
+                device_entry.id, name=device.name, suggested_area=device.zone_name
+            )
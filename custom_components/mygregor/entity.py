@@ -3,23 +3,75 @@ from __future__ import annotations
 
 from typing import Any
 
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
-from .const import ATTR_MAC
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import ATTR_MAC, ATTR_STALE
 
 
-class MyGregorDevice:
+class MyGregorDevice(CoordinatorEntity):
     """Interface for MyGregor devices, such as Drive and Station."""
 
-    sensors: dict[str, Any] = {}
-    extra_attrs: dict[str, Any] = {}
+    extra_attrs: dict[str, Any]
 
-    def __init__(self, device) -> None:
+    def __init__(self, device, registry) -> None:
         """Initialize device."""
+        super().__init__(registry.coordinator)
         self.device = device
-        self.extra_attrs[ATTR_MAC] = device.mac
+        self.registry = registry
+        self._id = int(device.unique_id)
+        self._fingerprint = None
+        self._last_update_success = True
+        self._seen = device
+        self.extra_attrs = {ATTR_MAC: device.mac}
         self._connections = {(CONNECTION_NETWORK_MAC, device.mac)}
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return entity specific state attributes. Needed in Entity class."""
         return self.extra_attrs
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Take this device out of the account-wide data and write the state.
+
+        Nothing is written when neither the device data nor the coordinator
+        availability changed since the last update. While the cloud is not
+        reachable the last known data is shown with the stale attribute set.
+        """
+        device = self.coordinator.data.get(self._id)
+        if device is not None and device is not self._seen:
+            self._seen = device
+            self._observe(device)
+        fingerprint = None
+        if device is not None:
+            fingerprint = (
+                device.fingerprint(),
+                self._state_fingerprint(),
+                self.coordinator.stale,
+            )
+        success = self.coordinator.last_update_success
+        if fingerprint == self._fingerprint and success == self._last_update_success:
+            return
+        self._fingerprint = fingerprint
+        self._last_update_success = success
+        if device is not None:
+            # Fresh object, so a new name or zone of the device is shown as well
+            self.device = device
+            self._set_device(device)
+        if self.coordinator.stale:
+            self.extra_attrs[ATTR_STALE] = True
+        else:
+            self.extra_attrs.pop(ATTR_STALE, None)
+        super()._handle_coordinator_update()
+
+    def _observe(self, device) -> None:
+        """Called once for every freshly fetched copy of the device, changed or not."""
+
+    def _state_fingerprint(self):
+        """Entity state that does not come from the device data, if any."""
+        return None
+
+    def _set_device(self, device) -> None:
+        """Apply fresh device data. Implemented in Drive and Station."""
+        raise NotImplementedError
@@ -0,0 +1,165 @@
+"""Rolling statistics of MyGregor station readings."""
+from __future__ import annotations
+
+from array import array
+from collections import deque
+import time
+
+# Trailing windows in seconds and their attribute suffixes
+WINDOWS = ((300, "5m"), (900, "15m"), (3600, "60m"))
+# Samples kept per sensor, an hour of readings at the 60 s poll plus margin
+CAPACITY = 128
+# Seconds between state writes of a held back sensor refreshing its statistics
+STATS_INTERVAL = 300
+
+
+class _Window:
+    """Running sums of the samples in one trailing window.
+
+    Samples are referenced by their sequence number in the ring buffer, adding
+    and evicting a sample is O(1).
+    """
+
+    __slots__ = ("seconds", "start", "end", "sum_v", "sum_t", "sum_tt", "sum_tv")
+
+    def __init__(self, seconds: float) -> None:
+        """Create empty window."""
+        self.seconds = seconds
+        self.start = 0
+        self.end = 0
+        self.sum_v = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_tv = 0.0
+
+    @property
+    def count(self) -> int:
+        """Number of samples in the window."""
+        return self.end - self.start
+
+    def add(self, t: float, value: float) -> None:
+        """Add the newest sample."""
+        self.end += 1
+        self.sum_v += value
+        self.sum_t += t
+        self.sum_tt += t * t
+        self.sum_tv += t * value
+
+    def remove(self, t: float, value: float) -> None:
+        """Remove the oldest sample."""
+        self.start += 1
+        self.sum_v -= value
+        self.sum_t -= t
+        self.sum_tt -= t * t
+        self.sum_tv -= t * value
+
+    def slope(self) -> float | None:
+        """Least squares slope in units per second, None below two samples."""
+        count = self.count
+        if count < 2:
+            return None
+        denominator = count * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0:
+            return None
+        return (count * self.sum_tv - self.sum_t * self.sum_v) / denominator
+
+
+class RollingStats:
+    """Fixed-size history of one sensor with mean, min, max and slope per window.
+
+    Timestamps and values are kept in two preallocated arrays used as a ring
+    buffer, so the memory per sensor does not grow. Every window keeps running
+    sums and monotonic min/max queues, updated when a sample is added or falls
+    out of the window. When the ring wraps before a window is full (polls
+    faster than CAPACITY per window) the window covers the samples kept.
+    """
+
+    __slots__ = ("_capacity", "_times", "_values", "_count", "_origin", "_windows")
+
+    def __init__(self, windows=WINDOWS, capacity: int = CAPACITY) -> None:
+        """Create empty history."""
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._count = 0
+        self._origin = None
+        self._windows = [
+            (_Window(seconds), suffix, deque(), deque()) for seconds, suffix in windows
+        ]
+
+    def __len__(self) -> int:
+        """Number of samples kept."""
+        return min(self._count, self._capacity)
+
+    def add(self, value, now: float = None) -> None:
+        """Add a reading taken at monotonic time now, None values are skipped."""
+        if value is None:
+            return
+        if now is None:
+            now = time.monotonic()
+        if self._origin is None:
+            self._origin = now
+        t = now - self._origin
+        value = float(value)
+        times, values, capacity = self._times, self._values, self._capacity
+        seq = self._count
+        # The slot of the new sample holds sample seq - capacity
+        kept = seq + 1 - capacity
+
+        for window, _, lows, highs in self._windows:
+            oldest = t - window.seconds
+            while window.start < seq and (
+                window.start < kept or times[window.start % capacity] < oldest
+            ):
+                index = window.start % capacity
+                window.remove(times[index], values[index])
+                if lows[0] < window.start:
+                    lows.popleft()
+                if highs[0] < window.start:
+                    highs.popleft()
+
+        times[seq % capacity] = t
+        values[seq % capacity] = value
+        self._count += 1
+        for window, _, lows, highs in self._windows:
+            window.add(t, value)
+            while lows and values[lows[-1] % capacity] >= value:
+                lows.pop()
+            lows.append(seq)
+            while highs and values[highs[-1] % capacity] <= value:
+                highs.pop()
+            highs.append(seq)
+
+    def stats(self, suffix: str) -> dict | None:
+        """Returns mean, min, max and slope per minute of the window."""
+        for window, window_suffix, lows, highs in self._windows:
+            if window_suffix == suffix:
+                return self._window_stats(window, lows, highs)
+        return None
+
+    def _window_stats(self, window, lows, highs) -> dict | None:
+        """Returns the statistics of one window, None when it is empty."""
+        if not window.count:
+            return None
+        slope = window.slope()
+        return {
+            "mean": window.sum_v / window.count,
+            "min": self._values[lows[0] % self._capacity],
+            "max": self._values[highs[0] % self._capacity],
+            "slope": slope * 60 if slope is not None else None,
+        }
+
+    def as_attributes(self, digits: int = 2) -> dict:
+        """Returns the statistics of all windows as flat state attributes.
+
+        e.g. mean_5m, min_5m, max_5m and slope_5m (change per minute).
+        """
+        result = {}
+        for window, suffix, lows, highs in self._windows:
+            stats = self._window_stats(window, lows, highs)
+            if stats is None:
+                continue
+            for key, value in stats.items():
+                if value is not None:
+                    result[f"{key}_{suffix}"] = round(value, digits)
+        return result
@@ -1,17 +1,84 @@
 """ Python wrapper for the MyGregor API."""
+from __future__ import annotations
 
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+import abc
+import asyncio
+import bisect
+from collections import OrderedDict, deque
 import json
 import logging
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+import weakref
+
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 BASE_URL = "https://api.mygregor.com"
 
 _LOGGER = logging.getLogger(__name__)
 
+# Decodes JSON response bodies (bytes or str), with orjson when it is installed
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _error_message(body) -> str | None:
+    """Returns the "message" of an error response body, if there is one."""
+    try:
+        return json_loads(body)["message"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
 
 class MyGregorDevice:
-    """MyGregor Device interface."""
+    """MyGregor Device interface.
+
+    Titles and units of the sensors are kept once per class in SENSORS, each
+    device only holds a fixed-size list of values in the same order.
+    """
+
+    # (sensor, measurement, title) of the sensors every device has
+    SENSORS = (
+        # typical sensors for WiFi devices
+        ("rssi", "dB", "RSSI"),
+        # not exactly sensors but attributes
+        ("hw_version", "", "Hardware Version"),
+        ("sw_version", "", "Software Version"),
+        ("state", "", "State"),  # Online/Offline
+    )
+    _SENSOR_INDEX = {sensor[0]: index for index, sensor in enumerate(SENSORS)}
+
+    __slots__ = (
+        "_id",
+        "_type",
+        "_name",
+        "_mac",
+        "_model",
+        "_zone_name",
+        "_zone_id",
+        "_schema",
+        "_index",
+        "_values",
+        "_sensors",
+    )
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Index the sensors of device type."""
+        super().__init_subclass__(**kwargs)
+        cls._SENSOR_INDEX = {
+            sensor[0]: index for index, sensor in enumerate(cls.SENSORS)
+        }
 
     def __init__(
         self, unique_id: int, device_type: str, name: str, mac: str, model: str
@@ -22,15 +89,13 @@ class MyGregorDevice:
         self._name = name
         self._mac = mac
         self._model = model
-        self._sensors = {}
         self._zone_name = None
         self._zone_id = None
-        # typical sensors for WiFi devices
-        self.enable_sensor("rssi", "dB", "RSSI")
-        # not exactly sensors but attributes
-        self.enable_sensor("hw_version", "", "Hardware Version")
-        self.enable_sensor("sw_version", "", "Software Version")
-        self.enable_sensor("state", "", "State")  # Online/Offline
+        self._schema = self.SENSORS
+        self._index = self._SENSOR_INDEX
+        self._values = [None] * len(self.SENSORS)
+        # get_sensors() results by active_only, dropped when a value changes
+        self._sensors = None
 
     @property
     def unique_id(self) -> str:
@@ -87,59 +152,103 @@ class MyGregorDevice:
         """Return zone name."""
         return self._zone_name
 
+    def fingerprint(self) -> tuple:
+        """Returns a hashable snapshot of everything the API reported for the device.
+
+        Two snapshots of the same device compare equal when nothing changed.
+        """
+        return (self._name, self._zone_id, self._zone_name, tuple(self._values))
+
+    def as_dict(self) -> dict:
+        """Returns the device as a JSON-serializable dict, see restore_device."""
+        return {
+            "id": self._id,
+            "type": self._type,
+            "name": self._name,
+            "mac": self._mac,
+            "model": self._model,
+            "zone": [self._zone_id, self._zone_name],
+            "values": {
+                sensor: [measurement, title, value]
+                for (sensor, measurement, title), value in zip(
+                    self._schema, self._values
+                )
+                if value is not None
+            },
+        }
+
     def set_zone(self, zone_id, zone_name):
         """Set's zone info."""
         self._zone_id = zone_id
         self._zone_name = zone_name
 
     def enable_sensor(self, sensor: str, measurement: str, title=None):
-        """Enable some sensors."""
+        """Enable some sensors.
+
+        Sensors of the device type are always enabled. Other sensors give the
+        device its own copy of the sensor list.
+        """
+        self._sensors = None
+        if sensor in self._index:
+            self._values[self._index[sensor]] = None
+            return
         if title is None:
             title = sensor
-        self._sensors[sensor] = {
-            "title": title,
-            "measurement": measurement,
-            "value": None,
-        }
+        self._schema = self._schema + ((sensor, measurement, title),)
+        self._index = {**self._index, sensor: len(self._values)}
+        self._values.append(None)
 
     def get_sensors(self, active_only=True):
         """Returns a list of available sensors.
 
         On active_only=False the sensors without values will be added in the list also.
+        The mapping is built once until a value changes and must not be modified.
         """
-        if active_only:
-            result = {}
-            for sensor in self._sensors:
-                if self._sensors[sensor]["value"] is not None:
-                    result[sensor] = self._sensors[sensor]
-            return result
-        else:
-            return self._sensors
+        cached = self._sensors
+        if cached is None:
+            cached = self._sensors = {}
+        sensors = cached.get(active_only)
+        if sensors is None:
+            sensors = cached[active_only] = {
+                sensor: {"title": title, "measurement": measurement, "value": value}
+                for (sensor, measurement, title), value in zip(
+                    self._schema, self._values
+                )
+                if value is not None or not active_only
+            }
+        return sensors
 
     def get_value(self, sensor: str):
         """Get the sensor value."""
-        return self._sensors[sensor]["value"]
+        return self._values[self._index[sensor]]
 
     def set_value(self, sensor: str, value):
         """Set some sensor value. The type of the sensor must be as the type of the measurement is."""
-        if sensor not in self._sensors:
+        index = self._index.get(sensor)
+        if index is None:
             raise Exception(f"Unknown sensor {sensor}")
 
-        self._sensors[sensor]["value"] = value
+        self._values[index] = value
+        self._sensors = None
 
 
 class MyGregorStation(MyGregorDevice):
     """MyGregor Station interface."""
 
+    SENSORS = MyGregorDevice.SENSORS + (
+        ("co2", "ppm", "CO₂"),
+        ("temperature", "℃", "Temperature"),
+        ("humidity", "%", "Humidity"),
+        ("noise", "dBA", "Noise"),
+        ("luminosity", "lx", "Luminosity"),
+        ("radiation", "µSv/h", "Radiation"),
+    )
+
+    __slots__ = ()
+
     def __init__(self, unique_id: int, name: str, mac: str, model: str = "") -> None:
         """Constructor needs the name of the station."""
         super().__init__(unique_id, "Station", name, mac=mac, model=model)
-        self.enable_sensor("co2", "ppm", "CO₂")
-        self.enable_sensor("temperature", "℃", "Temperature")
-        self.enable_sensor("humidity", "%", "Humidity")
-        self.enable_sensor("noise", "dBA", "Noise")
-        self.enable_sensor("luminosity", "lx", "Luminosity")
-        self.enable_sensor("radiation", "µSv/h", "Radiation")
 
     @property
     def temperature(self):
@@ -175,13 +284,18 @@ class MyGregorStation(MyGregorDevice):
 class MyGregorDrive(MyGregorDevice):
     """MyGregor Drive interface."""
 
+    SENSORS = MyGregorDevice.SENSORS + (
+        ("noise", "dBA", "Noise"),
+        ("voltage", "V", "Battery voltage"),
+        ("battery_level", "%", "Battery level"),
+        ("position", "%", "Position"),
+        ("power_profile", "", "Power Profile"),
+    )
+
+    __slots__ = ()
+
     def __init__(self, unique_id: int, name: str, mac: str, model: str = "") -> None:
         super().__init__(unique_id, "Drive", name, mac=mac, model=model)
-        self.enable_sensor("noise", "dBA", "Noise")
-        self.enable_sensor("voltage", "V", "Battery voltage")
-        self.enable_sensor("battery_level", "%", "Battery level")
-        self.enable_sensor("position", "%", "Position")
-        self.enable_sensor("power_profile", "", "Power Profile")
 
     @property
     def noise(self):
@@ -209,19 +323,340 @@ class MyGregorDrive(MyGregorDevice):
         return self.get_value("power_profile")
 
 
-class MyGregorApi:
-    """Interface class for the MyGregor API."""
+# Device classes by the "type" field of the API
+DEVICE_TYPES = {
+    "Station": MyGregorStation,
+    "Drive": MyGregorDrive,
+}
+
+# Device payload fields and the sensors they are stored in
+DEVICE_FIELDS = {
+    "hardware_version": "hw_version",
+    "software_version": "sw_version",
+    "power_profile": "power_profile",
+    "position": "position",
+    "status": "state",
+}
+
+# Fields of the "sensors_raw" part of the payload and the sensors they are stored in
+RAW_SENSOR_FIELDS = {
+    "co2": "co2",
+    "temperature": "temperature",
+    "humidity": "humidity",
+    "rssi": "rssi",
+    "noise": "noise",
+    "light": "luminosity",
+    "radiation": "radiation",
+    "battery_voltage": "voltage",
+    "battery_perc": "battery_level",
+}
+
+# Field to value index maps per device class, built from the tables on first use
+_DECODERS = {}
+
+
+def register_device_type(device_type: str, device_class) -> None:
+    """Decode payloads of the given type into device_class (a MyGregorDevice)."""
+    DEVICE_TYPES[device_type] = device_class
+    _DECODERS.clear()
+
+
+def register_field(field: str, sensor: str, raw: bool = False) -> None:
+    """Store payload field (of sensors_raw when raw is set) in the sensor."""
+    if raw:
+        RAW_SENSOR_FIELDS[field] = sensor
+    else:
+        DEVICE_FIELDS[field] = sensor
+    _DECODERS.clear()
+
+
+def _decoder(device_class):
+    """Returns field to value index maps for the device class.
+
+    Fields for sensors the class does not have are left out, so they are skipped.
+    """
+    if device_class not in _DECODERS:
+        index = device_class._SENSOR_INDEX
+        _DECODERS[device_class] = (
+            {f: index[s] for f, s in DEVICE_FIELDS.items() if s in index},
+            {f: index[s] for f, s in RAW_SENSOR_FIELDS.items() if s in index},
+            index["state"],
+        )
+    return _DECODERS[device_class]
+
+
+def decode_device(data) -> MyGregorDevice | None:
+    """Decodes a device payload of the API in one pass over its fields.
+
+    Returns None for device types without a registered class.
+    """
+    device_class = DEVICE_TYPES.get(data.get("type"))
+    if device_class is None:
+        _LOGGER.debug(
+            "Skipping device %s of unknown type %s", data.get("id"), data.get("type")
+        )
+        return None
+    device = device_class(data["id"], data["name"], data["mac"], str(data["model"]))
+    fields, raw_fields, state = _decoder(device_class)
+    values = device._values  # pylint: disable=protected-access
+    values[state] = "Offline"
+
+    for field, value in data.items():
+        index = fields.get(field)
+        if index is not None:
+            values[index] = value
+        elif field == "room":
+            device.set_zone(value["id"], value["name"])
+        elif field == "sensors_raw":
+            for raw_field, raw_value in value.items():
+                index = raw_fields.get(raw_field)
+                if index is not None:
+                    values[index] = raw_value
+
+    return device
+
+
+def restore_device(data) -> MyGregorDevice | None:
+    """Creates a device from a MyGregorDevice.as_dict() snapshot.
+
+    Returns None for device types without a registered class.
+    """
+    device_class = DEVICE_TYPES.get(data.get("type"))
+    if device_class is None:
+        return None
+    device = device_class(data["id"], data["name"], data["mac"], data["model"])
+    device.set_zone(*data["zone"])
+    for sensor, (measurement, title, value) in data["values"].items():
+        device.enable_sensor(sensor, measurement, title)
+        device.set_value(sensor, value)
+    return device
+
+
+class RateLimiter:
+    """Token bucket limiting the requests of one MyGregor account.
+
+    All clients of the same account share one limiter (see for_account),
+    so several config entries do not hit the cloud at the same moment. Commands
+    (PUT/POST) may use every token, polls (GET) leave `reserve` tokens for them,
+    so a command never waits behind a queue of sensor refreshes. After a 429
+    response everything waits until the Retry-After time has passed.
+    """
+
+    # Requests per second and bucket size
+    rate = 2.0
+    burst = 10
+    # Tokens polls leave for commands
+    reserve = 2
+
+    _limiters = weakref.WeakValueDictionary()
+    _limiters_lock = threading.Lock()
 
     def __init__(self) -> None:
-        """Constructor for MyGregor API class."""
+        """Start with a full bucket."""
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self.throttled = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def for_account(cls, account: str) -> RateLimiter:
+        """Returns the limiter shared by all clients of the account.
+
+        The account is the login e-mail, or the access token when it was set
+        directly.
+        """
+        with cls._limiters_lock:
+            limiter = cls._limiters.get(account)
+            if limiter is None:
+                limiter = cls()
+                cls._limiters[account] = limiter
+            return limiter
+
+    def acquire(self, command: bool) -> float:
+        """Takes a token and returns 0, or returns seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            needed = 1 if command else 1 + self.reserve
+            if self._tokens >= needed:
+                self._tokens -= 1
+                return 0
+            self.throttled += 1
+            return (needed - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Stops all requests for the given seconds (HTTP 429 Retry-After)."""
+        with self._lock:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host that keeps failing.
+
+    After `threshold` failures in a row the circuit opens and requests fail right
+    away with CircuitOpenException. After `reset_timeout` seconds one trial request
+    is let through: any answer below 500 closes the circuit, a server or
+    connection error opens it again.
+    All clients talking to the same host share one breaker (see for_host).
+    """
+
+    threshold = 5
+    reset_timeout = 60
+
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self, host: str) -> None:
+        """Start closed."""
+        self.host = host
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @classmethod
+    def for_host(cls, url: str) -> CircuitBreaker:
+        """Returns the breaker shared by all clients using the host of the URL."""
+        host = urlsplit(url).netloc
+        with cls._breakers_lock:
+            if host not in cls._breakers:
+                cls._breakers[host] = cls(host)
+            return cls._breakers[host]
+
+    @property
+    def is_open(self) -> bool:
+        """True while requests to the host are refused."""
+        return self._opened_at is not None
+
+    def retry_in(self) -> float:
+        """Seconds until a trial request will be let through."""
+        if self._opened_at is None:
+            return 0
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0)
+
+    def before_request(self) -> bool:
+        """Raises CircuitOpenException if the request must not be sent.
+
+        Returns True if the request is the trial of a half-open circuit, the
+        caller has to end it with end_trial() however the request ends.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._trial or self.retry_in() > 0:
+                raise CircuitOpenException(self.host, self.retry_in())
+            self._trial = True
+            return True
+
+    def end_trial(self) -> None:
+        """The trial request ended, let the next one through if it was not recorded.
+
+        Covers trials that were cancelled or failed without a verdict on the
+        host, the circuit stays open and its timeout is not restarted.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_success(self) -> None:
+        """The host answered, close the circuit."""
+        with self._lock:
+            if self._opened_at is not None:
+                _LOGGER.info("API host %s is back, closing circuit", self.host)
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """The host failed to answer, open the circuit after too many failures."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (
+                self._opened_at is None and self._failures >= self.threshold
+            ):
+                if not self._trial:
+                    _LOGGER.warning(
+                        "API host %s failed %s times, pausing requests for %s s",
+                        self.host,
+                        self._failures,
+                        self.reset_timeout,
+                    )
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class MyGregorApiBase:
+    """Parts of the MyGregor API client shared by the blocking and asyncio versions.
+
+    Everything here is free of I/O: token bookkeeping, building the requests and
+    turning the responses into MyGregorDevice objects.
+    """
+
+    # Seconds a device to zone mapping is trusted before it is looked up again
+    zone_ttl = 3600
+    # Times a request is sent again after HTTP 429
+    rate_limit_retries = 2
+    # Seconds to wait after HTTP 429 without a usable Retry-After header
+    default_retry_after = 5
+    # Times a GET is sent again after a server or connection error
+    max_retries = 3
+    # Base and maximum of the exponential backoff between those retries
+    retry_backoff = 0.5
+    retry_backoff_max = 8
+    # Connection errors of the HTTP library worth retrying, set by the clients
+    TRANSIENT_ERRORS = ()
+    # Seconds before the token expires when it is renewed with the stored login
+    token_refresh_margin = 300
+
+    def __init__(self, base_url: str = BASE_URL) -> None:
+        """Constructor for MyGregor API class.
+
+        base_url can point to another server, such as a local stand-in.
+        """
+        self._base_url = base_url
         self._username = None
         self._password = None
         self._access_token = None
         self._token_expires_at = None
+        self._zones = {}
+        self._limiter = None
+        self._breaker = CircuitBreaker.for_host(base_url)
+        self.metrics = ApiMetrics(base_url)
+        # GETs in flight by endpoint, identical concurrent GETs share one request
+        self._inflight = {}
+        self.single_flight = HitStats()
+        self.cache = ResponseCache()
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """The breaker of the API host."""
+        return self._breaker
+
+    def _check_transport(self, base) -> None:
+        """Raises TypeError if the transport of the client is not a base."""
+        if not isinstance(self.transport, base):
+            raise TypeError(
+                f"{type(self).__name__} needs a transport of type {base.__name__},"
+                f" got {type(self.transport).__name__}"
+            )
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        """The limiter of the account, None until a token or login is set."""
+        return self._limiter
 
     def set_access_token(self, access_token: str, expires_in: int = 0) -> None:
         """Sets the token to access user's protected content."""
         self._access_token = access_token
+        self._limiter = RateLimiter.for_account(self._username or access_token)
         if expires_in > 0:
             self._token_expires_at = datetime.now() + timedelta(0, expires_in)
         else:
@@ -232,8 +667,69 @@ class MyGregorApi:
         """Returns obtained or previously set access_token"""
         return self._access_token
 
-    def login(self, username: str, password: str) -> bool:
-        """Try to obtain access_token."""
+    def _can_login(self) -> bool:
+        """True when login() was used, so the token can be renewed."""
+        return self._username is not None and self._password is not None
+
+    def _token_expiring(self) -> bool:
+        """True when the token expires within token_refresh_margin seconds."""
+        return (
+            self._can_login()
+            and self._token_expires_at is not None
+            and datetime.now()
+            >= self._token_expires_at - timedelta(seconds=self.token_refresh_margin)
+        )
+
+    def _refresh_needed(self, rejected_token) -> bool:
+        """Decides (under the login lock) whether this caller has to log in again.
+
+        rejected_token is the token refused with 401, or None for a renewal
+        before expiry. When another caller already replaced the token there is
+        nothing left to do.
+        """
+        if rejected_token is not None:
+            return rejected_token == self._access_token
+        return self._token_expiring()
+
+    def remember_zone(self, device_id: int, zone_id: int) -> None:
+        """Stores the zone of the device in the device to zone index."""
+        self._zones[device_id] = (zone_id, time.monotonic() + self.zone_ttl)
+
+    def forget_zone(self, device_id: int = None) -> None:
+        """Drops the zone of the device (or of all devices) from the index.
+
+        Cached device responses carry the zone too, they are dropped as well so
+        the next lookup asks the API.
+        """
+        if device_id is None:
+            self._zones.clear()
+            self.cache.invalidate("/v2/devices")
+        else:
+            self._zones.pop(device_id, None)
+            self.cache.invalidate(f"/v2/devices/{device_id}?", "/v2/devices?")
+
+    def zone_of(self, device_id: int):
+        """Returns the indexed zone ID of the device or None if unknown or expired."""
+        zone = self._zones.get(device_id)
+        if zone is None:
+            return None
+        if zone[1] < time.monotonic():
+            del self._zones[device_id]
+            return None
+        return zone[0]
+
+    @staticmethod
+    def _include(include_data: bool, include_zone: bool) -> str:
+        """Builds the include query parameter for device requests."""
+        include = []
+        if include_data:
+            include += ["device_data"]
+        if include_zone:
+            include += ["room_data"]
+        return ",".join(include)
+
+    def _login_request(self, username: str, password: str):
+        """Returns endpoint, headers and body for the login request."""
         headers = {
             "Content-Type": "application/json",
         }
@@ -241,27 +737,23 @@ class MyGregorApi:
             "email": username,
             "password": password,
         }
+        _LOGGER.debug("Accessing API /v2/auth for user %s login", username)
+        return "/v2/auth", headers, json.dumps(payload)
 
+    def _login_response(
+        self, username: str, password: str, status: int, body: bytes
+    ):
+        """Checks login response and stores the obtained access token."""
         endpoint = "/v2/auth"
-        url = BASE_URL + endpoint
+        _LOGGER.debug("API %s response code: %s", endpoint, status)
 
-        _LOGGER.debug("Accessing API %s for user %s login", endpoint, username)
-        response = requests.request(
-            "POST", url, data=json.dumps(payload), headers=headers
-        )
-        _LOGGER.debug("API %s response code: %s", endpoint, response.status_code)
-
-        try:
-            error_msg = json.loads(response.text)["message"]
-        except json.JSONDecodeError:
-            error_msg = f"Error {response.status_code} on login"
-
-        if response.status_code == 400:
-            raise UnauthorizedException(error_msg)
-        if response.status_code != 200:
+        if status != 200:
+            error_msg = _error_message(body) or f"Error {status} on login"
+            if status == 400:
+                raise UnauthorizedException(error_msg)
             raise MyGregorApiException(error_msg)
 
-        data = response.json()
+        data = json_loads(body)
         _LOGGER.debug("API %s returned: %s", endpoint, data)
         self._username = username
         self._password = password
@@ -269,6 +761,859 @@ class MyGregorApi:
 
         return True
 
+    def _prepare_request(self, method, endpoint, payload):
+        """Returns URL, headers and body for a request with the access token."""
+        if not self._access_token:
+            raise UnauthorizedException("Access token not set")
+
+        url = self._base_url + endpoint
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer " + self._access_token,
+        }
+        data = None
+        if (method in ["POST", "PUT"]) and payload:
+            data = json.dumps(payload)
+
+        _LOGGER.debug("Accessing API %s with token", endpoint)
+        return url, headers, data
+
+    def _throttle(self, method) -> float:
+        """Returns seconds to wait before the request may be sent, 0 to send now."""
+        if self._limiter is None:
+            return 0
+        return self._limiter.acquire(method != "GET")
+
+    def _retry_delay(self, method, err: Exception, attempt: int) -> float | None:
+        """Decides about retrying a failed request.
+
+        Returns seconds to wait before sending it again or None to give up.
+        After HTTP 429 the account's requests are paused by the rate limiter.
+        Server and connection errors count against the circuit breaker and
+        only GET requests, which are idempotent, are retried with jittered
+        exponential backoff.
+        """
+        if isinstance(err, RateLimitedException):
+            _LOGGER.warning("Rate limited by API, retrying after %s s", err.retry_after)
+            if self._limiter is not None:
+                self._limiter.pause(err.retry_after)
+            return 0 if attempt < self.rate_limit_retries else None
+        if not isinstance(err, (ServerErrorException,) + self.TRANSIENT_ERRORS):
+            return None
+        self._breaker.record_failure()
+        if method != "GET" or attempt >= self.max_retries or self._breaker.is_open:
+            return None
+        delay = random.uniform(
+            0, min(self.retry_backoff_max, self.retry_backoff * 2**attempt)
+        )
+        _LOGGER.debug("API request failed (%s), retrying in %.1f s", err, delay)
+        return delay
+
+    def _retry_after(self, headers) -> float:
+        """Returns seconds from the Retry-After header (seconds or HTTP date)."""
+        value = headers.get("Retry-After") if headers else None
+        if value:
+            try:
+                return max(float(value), 0)
+            except ValueError:
+                pass
+            try:
+                retry_at = parsedate_to_datetime(value)
+                return max(retry_at.timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                pass
+        return self.default_retry_after
+
+    def _response(
+        self, method, endpoint, url, data, status: int, body: bytes, headers=None
+    ):
+        """Checks the response status and returns decoded body.
+
+        The body is decoded once, either for the data or for the error message.
+        """
+        _LOGGER.debug("API %s response code: %s", endpoint, status)
+
+        if status != 200:
+            if status == 429:
+                raise RateLimitedException(self._retry_after(headers))
+            error_msg = (
+                _error_message(body)
+                or f"Error {status} executing {method} {endpoint} with {data}"
+            )
+            if status == 401:
+                raise UnauthorizedException(error_msg)
+            if status == 404:
+                raise NotFoundException(f"URL {url} Not Found")
+            if status >= 500:
+                raise ServerErrorException(status, error_msg)
+            raise MyGregorApiException(status, error_msg)
+
+        data = json_loads(body)
+        _LOGGER.debug("API %s %s returned: %s", method, endpoint, data)
+
+        return data
+
+    @staticmethod
+    def _check_zone_state(state: str) -> None:
+        """Raises on zone states the API does not know."""
+        available_states = ("auto", "open", "close", "airing", "relax")
+        if state not in available_states:
+            raise MyGregorApiException(
+                f"Zone state can be one of the following {available_states}. Unknown state '{state}' is given."
+            )
+
+    @staticmethod
+    def _zone_endpoint(zone_id: int, include_image: bool) -> str:
+        """Endpoint of a zone with its devices and their data."""
+        include = "power_profile,room_data,devices,device_data"
+        if include_image:
+            include = "image," + include
+        return f"/v2/rooms/{zone_id}?include={include}"
+
+    def _zone_devices(self, zone) -> list[MyGregorDevice]:
+        """Decodes the devices of a zone payload, they all belong to that zone."""
+        result = []
+        for data in zone.get("devices") or ():
+            device = decode_device(data)
+            if device is None:
+                continue
+            if device.zone_id is None:
+                device.set_zone(zone["id"], zone.get("name"))
+            self.remember_zone(device.unique_id, device.zone_id)
+            result.append(device)
+        return result
+
+    def _zone_changed(self, zone_id: int) -> None:
+        """Drops cached responses showing the state of the zone."""
+        self.cache.invalidate("/v2.1/rooms", f"/v2/rooms/{zone_id}?")
+
+    def _set_device(self, data) -> MyGregorDevice:
+        """Decodes device payload and indexes the zone of the device."""
+        device = decode_device(data)
+        if device is not None and device.zone_id is not None:
+            self.remember_zone(device.unique_id, device.zone_id)
+        return device
+
+
+class HitStats:
+    """Counts requests served from shared work (hits) and ones that did it (misses)."""
+
+    def __init__(self) -> None:
+        """Start with empty counters."""
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of hits of all lookups."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a dict."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
+
+
+class CacheStats(HitStats):
+    """HitStats of the response cache, with stale hits, evictions and invalidations."""
+
+    def __init__(self) -> None:
+        """Start with empty counters."""
+        super().__init__()
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of fresh and stale hits of all lookups."""
+        total = self.hits + self.stale + self.misses
+        return (self.hits + self.stale) / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a dict."""
+        return {
+            **super().as_dict(),
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class _CacheEntry:
+    """A cached response and until when it is served."""
+
+    __slots__ = ("response", "expires", "stale_until", "refreshing")
+
+    def __init__(self, response, expires: float, stale_until: float) -> None:
+        """Create entry."""
+        self.response = response
+        self.expires = expires
+        self.stale_until = stale_until
+        self.refreshing = False
+
+
+class ResponseCache:
+    """LRU cache of decoded GET responses with a lifetime per endpoint.
+
+    Only endpoints listed in TTLS are cached, and never with live device data.
+    A fresh entry is returned as is. An expired entry is still returned for its
+    stale-while-revalidate time, and the first caller to get it refreshes it
+    in the background. Writes invalidate the endpoints they change (see
+    invalidate). Responses that were requested before an invalidation are
+    not stored, so a slow GET cannot bring back data older than the write.
+    """
+
+    # (endpoint prefix, seconds fresh, further seconds served stale while refreshed)
+    TTLS = (
+        ("/v2/accounts/me", 3600, 86400),
+        ("/v2.1/rooms", 3600, 3600),
+        ("/v2/devices", 600, 3600),
+    )
+    # Include of live readings, responses with it are not cached
+    LIVE_INCLUDE = "device_data"
+    # Entries kept, the least recently used one is dropped first
+    max_entries = 64
+
+    def __init__(self) -> None:
+        """Create empty cache."""
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        """Number of entries."""
+        return len(self._entries)
+
+    def policy(self, endpoint: str):
+        """Returns seconds fresh and stale of the endpoint, None if not cached."""
+        if self.LIVE_INCLUDE in endpoint:
+            return None
+        for prefix, ttl, stale in self.TTLS:
+            if endpoint.startswith(prefix):
+                return ttl, stale
+        return None
+
+    def get(self, endpoint: str):
+        """Returns the cached response and whether the caller should refresh it.
+
+        None when there is no usable entry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if entry is None or now >= entry.stale_until:
+                if entry is not None:
+                    del self._entries[endpoint]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(endpoint)
+            if now < entry.expires:
+                self.stats.hits += 1
+                return entry.response, False
+            self.stats.stale += 1
+            revalidate = not entry.refreshing
+            entry.refreshing = True
+            return entry.response, revalidate
+
+    def put(self, endpoint: str, response, policy, generation: int) -> None:
+        """Stores a response requested at the given generation."""
+        ttl, stale = policy
+        now = time.monotonic()
+        with self._lock:
+            if generation != self.generation:
+                return
+            entry = _CacheEntry(response, now + ttl, now + ttl + stale)
+            self._entries[endpoint] = entry
+            self._entries.move_to_end(endpoint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def refresh_failed(self, endpoint: str) -> None:
+        """Lets the next caller of the stale entry try to refresh it again."""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            if entry is not None:
+                entry.refreshing = False
+
+    def invalidate(self, *prefixes: str) -> None:
+        """Drops the entries of endpoints starting with any of the prefixes."""
+        with self._lock:
+            self.generation += 1
+            for endpoint in [e for e in self._entries if e.startswith(prefixes)]:
+                del self._entries[endpoint]
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        """Drops all entries."""
+        self.invalidate("")
+
+
+class _Flight:
+    """A GET in flight and the outcome its waiting callers share."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        """Create unfinished flight."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ConnectionStats:
+    """Counts requests sent over new and over reused (keep-alive) connections."""
+
+    def __init__(self) -> None:
+        """Start with empty counters."""
+        self.requests = 0
+        self.new_connections = 0
+        self._new_time = 0.0
+        self._reused_time = 0.0
+
+    def record(self, new_connection: bool, elapsed: float) -> None:
+        """Record one finished request and its duration in seconds."""
+        self.requests += 1
+        if new_connection:
+            self.new_connections += 1
+            self._new_time += elapsed
+        else:
+            self._reused_time += elapsed
+
+    @property
+    def reused(self) -> int:
+        """Number of requests sent over an already open connection."""
+        return self.requests - self.new_connections
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of requests that did not open a new connection."""
+        return self.reused / self.requests if self.requests else 0.0
+
+    @property
+    def handshake_savings(self) -> float:
+        """Estimated seconds saved by not connecting (TCP + TLS) for reused requests.
+
+        The estimate is the difference between the average duration of requests
+        that had to connect and those that did not, times the reused requests.
+        """
+        if not self.new_connections or not self.reused:
+            return 0.0
+        new_avg = self._new_time / self.new_connections
+        reused_avg = self._reused_time / self.reused
+        return max(new_avg - reused_avg, 0.0) * self.reused
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a dict."""
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused": self.reused,
+            "reuse_rate": round(self.reuse_rate, 3),
+            "handshake_savings": round(self.handshake_savings, 3),
+        }
+
+
+class EndpointStats:
+    """Counters and latency histogram of one endpoint."""
+
+    __slots__ = ("requests", "errors", "buckets", "total_time", "max_time", "bytes")
+
+    def __init__(self) -> None:
+        """Start with empty counters."""
+        self.requests = 0
+        self.errors = {}
+        self.buckets = [0] * (len(ApiMetrics.LATENCY_BUCKETS) + 1)
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.bytes = 0
+
+    def percentile(self, share: float) -> float | None:
+        """Upper bound of the bucket holding the given share (0..1) of requests.
+
+        None if there were no requests or they fall above the largest bucket.
+        """
+        if not self.requests:
+            return None
+        rank = share * self.requests
+        count = 0
+        for bound, hits in zip(ApiMetrics.LATENCY_BUCKETS, self.buckets):
+            count += hits
+            if count >= rank:
+                return bound
+        return None
+
+    def as_dict(self) -> dict:
+        """Returns the counters as a dict."""
+        bounds = [str(bound) for bound in ApiMetrics.LATENCY_BUCKETS] + ["inf"]
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "bytes_received": self.bytes,
+            "latency_avg": round(self.total_time / self.requests, 3)
+            if self.requests
+            else None,
+            "latency_max": round(self.max_time, 3),
+            "latency_p50": self.percentile(0.5),
+            "latency_p95": self.percentile(0.95),
+            "latency_histogram": dict(zip(bounds, self.buckets)),
+        }
+
+
+class ApiMetrics:
+    """Request counts, errors by status, latency and bytes per API endpoint.
+
+    Endpoints are keyed by method and path with numeric IDs replaced by {id},
+    e.g. "GET /v2/devices/{id}", so the number of keys stays small. Errors are
+    counted by HTTP status (4xx and 5xx) or by exception name when no response
+    was received.
+    """
+
+    # Upper bounds in seconds of the latency histogram buckets
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, base_url: str = BASE_URL) -> None:
+        """Start with empty counters."""
+        self._base_path = urlsplit(base_url).path.rstrip("/")
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.started = time.time()
+
+    def endpoint(self, method: str, url: str) -> str:
+        """Returns the counter key of the request."""
+        path = urlsplit(url).path
+        if self._base_path and path.startswith(self._base_path):
+            path = path[len(self._base_path) :]
+        parts = ["{id}" if part.isdigit() else part for part in path.split("/")]
+        return f"{method} {'/'.join(parts)}"
+
+    def record(
+        self, method: str, url: str, status, elapsed: float, size: int = 0
+    ) -> None:
+        """Record one request.
+
+        status is the HTTP status code, or the name of the exception raised
+        instead of a response.
+        """
+        key = self.endpoint(method, url)
+        bucket = bisect.bisect_left(self.LATENCY_BUCKETS, elapsed)
+        with self._lock:
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            stats.requests += 1
+            stats.buckets[bucket] += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.bytes += size
+            if not isinstance(status, int) or status >= 400:
+                stats.errors[status] = stats.errors.get(status, 0) + 1
+
+    @property
+    def requests(self) -> int:
+        """Requests sent to all endpoints."""
+        return sum(stats.requests for stats in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        """Failed requests of all endpoints."""
+        return sum(sum(stats.errors.values()) for stats in self.endpoints.values())
+
+    @property
+    def bytes_received(self) -> int:
+        """Response body bytes of all endpoints."""
+        return sum(stats.bytes for stats in self.endpoints.values())
+
+    @property
+    def latency_avg(self) -> float | None:
+        """Average request duration in seconds over all endpoints."""
+        requests = self.requests
+        if not requests:
+            return None
+        return sum(stats.total_time for stats in self.endpoints.values()) / requests
+
+    def reset(self) -> None:
+        """Clear all counters."""
+        with self._lock:
+            self.endpoints = {}
+            self.started = time.time()
+
+    def as_dict(self) -> dict:
+        """Returns totals and the counters per endpoint as a dict."""
+        latency_avg = self.latency_avg
+        return {
+            "since": self.started,
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes_received": self.bytes_received,
+            "latency_avg": round(latency_avg, 3) if latency_avg is not None else None,
+            "endpoints": {
+                key: stats.as_dict() for key, stats in sorted(self.endpoints.items())
+            },
+        }
+
+
+class Transport(abc.ABC):
+    """Sends one HTTP request and returns status, headers and body of the response.
+
+    The API classes build URLs, headers and payloads, handle errors and retries,
+    and leave the exchange itself to a transport, so requests can go to the
+    cloud, to an in-memory fake or to a recorded session. MyGregorApi needs a
+    Transport, AsyncMyGregorApi an AsyncTransport. Transports which can do
+    both derive from both.
+    """
+
+    @abc.abstractmethod
+    def send(self, method: str, url: str, data, headers: dict):
+        """Sends the request from a worker thread."""
+
+    def close(self) -> None:
+        """Releases connections and files."""
+
+
+class AsyncTransport(abc.ABC):
+    """Sends one HTTP request from the event loop, see Transport."""
+
+    @abc.abstractmethod
+    async def async_send(self, method: str, url: str, data, headers: dict):
+        """Sends the request and returns status, headers and body of the response."""
+
+    def close(self) -> None:
+        """Releases connections and files."""
+
+
+class RequestsTransport(Transport):
+    """Sends requests over one requests.Session with a keep-alive pool."""
+
+    def __init__(self, base_url: str = BASE_URL, pool_size: int = 10) -> None:
+        """Create transport with pool_size connections kept open to the host."""
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session = requests.Session()
+        self._session.mount(base_url, self._adapter)
+        self.connection_stats = ConnectionStats()
+
+    def _connections_opened(self) -> int:
+        """Number of connections the pool has opened so far."""
+        pools = self._adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def send(self, method, url, data, headers):
+        """Sends the request and records connection reuse."""
+        opened = self._connections_opened()
+        started = time.monotonic()
+        response = self._session.request(method, url, data=data, headers=headers)
+        self.connection_stats.record(
+            self._connections_opened() > opened, time.monotonic() - started
+        )
+        return response.status_code, response.headers, response.content
+
+    def close(self) -> None:
+        """Closes all pooled connections."""
+        self._session.close()
+
+
+class AiohttpTransport(AsyncTransport):
+    """Sends requests over the given aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        """Create transport, the session is owned by the caller."""
+        self._session = session
+
+    async def async_send(self, method, url, data, headers):
+        """Sends the request and reads the whole body."""
+        async with self._session.request(
+            method, url, data=data, headers=headers
+        ) as response:
+            body = await response.read()
+        return response.status, response.headers, body
+
+
+class FakeTransport(Transport, AsyncTransport):
+    """Answers requests in memory, e.g. for benchmarks and tests.
+
+    handler(method, path, query, data, headers) returns status, payload and
+    response headers. query is a dict of the query parameters, a payload that
+    is not bytes or str is sent as JSON.
+    """
+
+    def __init__(self, handler) -> None:
+        """Create transport answering with handler."""
+        self._handler = handler
+
+    def send(self, method, url, data, headers):
+        """Calls the handler."""
+        parts = urlsplit(url)
+        status, payload, response_headers = self._handler(
+            method, parts.path, dict(parse_qsl(parts.query)), data, headers
+        )
+        if isinstance(payload, str):
+            payload = payload.encode()
+        elif not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode()
+        return status, CaseInsensitiveDict(response_headers or {}), payload
+
+    async def async_send(self, method, url, data, headers):
+        """Calls the handler on the event loop."""
+        return self.send(method, url, data, headers)
+
+
+class _Recorder:
+    """Writes the exchanges of a wrapped transport to a cassette.
+
+    The cassette is a JSON lines file: a header line, then one line per
+    exchange with method, path and query, duration, status, the headers the
+    API classes read and the body. Request payloads and headers are not
+    written and tokens in response bodies are replaced, so cassettes of
+    production traffic hold no credentials. Failed exchanges are written with
+    the exception name.
+    """
+
+    CASSETTE_VERSION = 1
+    # Response headers kept in the cassette
+    HEADERS = ("Content-Type", "Retry-After")
+    # Response body keys whose values are replaced
+    SECRETS = ("token",)
+    # Transport base the wrapped transport must have
+    WRAPS = None
+
+    def __init__(self, transport, path: str) -> None:
+        """Create transport recording the exchanges of transport to path."""
+        if not isinstance(transport, self.WRAPS):
+            raise TypeError(
+                f"{type(self).__name__} wraps a transport of type"
+                f" {self.WRAPS.__name__}, got {type(transport).__name__}"
+            )
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+        self._write({"version": self.CASSETTE_VERSION, "recorded": time.time()})
+        self.recorded = 0
+
+    def _write(self, line: dict) -> None:
+        """Appends one line to the cassette."""
+        with self._lock:
+            self._file.write(json.dumps(line) + "\n")
+            self._file.flush()
+
+    def _record(self, method, url, elapsed, response=None, error=None) -> None:
+        """Writes one exchange."""
+        parts = urlsplit(url)
+        line = {
+            "method": method,
+            "target": f"{parts.path}?{parts.query}" if parts.query else parts.path,
+            "elapsed": round(elapsed, 6),
+        }
+        if error is not None:
+            line["error"] = type(error).__name__
+        else:
+            status, headers, body = response
+            line["status"] = status
+            line["headers"] = {
+                name: headers[name] for name in self.HEADERS if name in headers
+            }
+            line["body"] = self._redact(body)
+        self._write(line)
+        self.recorded += 1
+
+    def _redact(self, body: bytes) -> str:
+        """Returns the body as text with secret values replaced."""
+        try:
+            data = json_loads(body)
+        except ValueError:
+            return body.decode("utf-8", "replace")
+        if isinstance(data, dict) and any(key in data for key in self.SECRETS):
+            for key in self.SECRETS:
+                if key in data:
+                    data[key] = "redacted"
+            return json.dumps(data)
+        return body.decode("utf-8", "replace")
+
+    def close(self) -> None:
+        """Closes the cassette and the wrapped transport."""
+        self._file.close()
+        self._transport.close()
+
+
+class RecordingTransport(_Recorder, Transport):
+    """Records the exchanges of a Transport, see _Recorder."""
+
+    WRAPS = Transport
+
+    def send(self, method, url, data, headers):
+        """Sends the request with the wrapped transport and records it."""
+        started = time.monotonic()
+        try:
+            response = self._transport.send(method, url, data, headers)
+        except Exception as err:
+            self._record(method, url, time.monotonic() - started, error=err)
+            raise
+        self._record(method, url, time.monotonic() - started, response)
+        return response
+
+
+class AsyncRecordingTransport(_Recorder, AsyncTransport):
+    """Records the exchanges of an AsyncTransport, see _Recorder."""
+
+    WRAPS = AsyncTransport
+
+    async def async_send(self, method, url, data, headers):
+        """Sends the request with the wrapped transport and records it."""
+        started = time.monotonic()
+        try:
+            response = await self._transport.async_send(method, url, data, headers)
+        except Exception as err:
+            self._record(method, url, time.monotonic() - started, error=err)
+            raise
+        self._record(method, url, time.monotonic() - started, response)
+        return response
+
+
+class ReplayTransport(Transport, AsyncTransport):
+    """Answers requests from a cassette written by (Async)RecordingTransport.
+
+    Requests are matched by method, path and query, repeated requests get the
+    recorded responses in recorded order. Each response is delayed by its
+    recorded duration divided by speed, speed=None answers right away.
+    Recorded failures are raised as connection errors, so retries behave as
+    recorded. A request without a recorded response left raises
+    CassetteMissException.
+    """
+
+    def __init__(self, path: str, speed: float | None = 1.0) -> None:
+        """Load the cassette at path."""
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._exchanges = {}
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline())
+            if header.get("version") != _Recorder.CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}")
+            for line in file:
+                if line.strip():
+                    exchange = json.loads(line)
+                    key = (exchange["method"], exchange["target"])
+                    self._exchanges.setdefault(key, deque()).append(exchange)
+        self.replayed = 0
+
+    def _next(self, method: str, url: str) -> dict:
+        """Returns the next recorded exchange of the request."""
+        parts = urlsplit(url)
+        target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        with self._lock:
+            exchanges = self._exchanges.get((method, target))
+            if not exchanges:
+                raise CassetteMissException(
+                    f"No recorded response for {method} {target}"
+                )
+            self.replayed += 1
+            return exchanges.popleft()
+
+    def _delay(self, exchange: dict) -> float:
+        """Seconds to wait before answering."""
+        return exchange["elapsed"] / self.speed if self.speed else 0.0
+
+    @staticmethod
+    def _response(exchange: dict, connection_error):
+        """Returns the recorded response or raises the recorded failure."""
+        if "error" in exchange:
+            raise connection_error(f"Recorded {exchange['error']}")
+        return (
+            exchange["status"],
+            CaseInsensitiveDict(exchange["headers"]),
+            exchange["body"].encode(),
+        )
+
+    def send(self, method, url, data, headers):
+        """Answers from the cassette."""
+        exchange = self._next(method, url)
+        time.sleep(self._delay(exchange))
+        return self._response(exchange, requests.ConnectionError)
+
+    async def async_send(self, method, url, data, headers):
+        """Answers from the cassette."""
+        exchange = self._next(method, url)
+        await asyncio.sleep(self._delay(exchange))
+        return self._response(exchange, aiohttp.ClientConnectionError)
+
+    @property
+    def remaining(self) -> int:
+        """Recorded exchanges not replayed yet."""
+        return sum(len(exchanges) for exchanges in self._exchanges.values())
+
+
+class MyGregorApi(MyGregorApiBase):
+    """Interface class for the MyGregor API.
+
+    By default all requests go through one requests.Session with a keep-alive
+    connection pool (RequestsTransport), so polls and commands reuse the TCP/TLS
+    connection to the API host.
+    """
+
+    TRANSIENT_ERRORS = (requests.RequestException,)
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        base_url: str = BASE_URL,
+        transport: Transport = None,
+    ) -> None:
+        """Constructor for MyGregor API class.
+
+        pool_size is the number of connections kept open to the API host by the
+        default RequestsTransport, transport replaces it.
+        """
+        super().__init__(base_url)
+        self.transport = transport or RequestsTransport(base_url, pool_size)
+        self._check_transport(Transport)
+        self._login_lock = threading.Lock()
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def connection_stats(self) -> ConnectionStats | None:
+        """Connection reuse of the transport, None if it does not count it."""
+        return getattr(self.transport, "connection_stats", None)
+
+    def close_session(self) -> None:
+        """Closes all pooled connections."""
+        self.transport.close()
+
+    def _send(self, method, url, data, headers):
+        """Sends the request with the transport, returns status, headers and body."""
+        started = time.monotonic()
+        try:
+            status, response_headers, body = self.transport.send(
+                method, url, data, headers
+            )
+        except Exception as err:
+            self.metrics.record(
+                method, url, type(err).__name__, time.monotonic() - started
+            )
+            raise
+        self.metrics.record(method, url, status, time.monotonic() - started, len(body))
+        return status, response_headers, body
+
+    def login(self, username: str, password: str) -> bool:
+        """Try to obtain access_token."""
+        endpoint, headers, data = self._login_request(username, password)
+        status, _, body = self._send("POST", self._base_url + endpoint, data, headers)
+        return self._login_response(username, password, status, body)
+
+    def refresh_token(self, rejected_token: str = None) -> None:
+        """Logs in again with the stored credentials.
+
+        Concurrent callers wait for one login instead of each logging in.
+        """
+        with self._login_lock:
+            if self._refresh_needed(rejected_token):
+                _LOGGER.debug("Renewing access token")
+                self.login(self._username, self._password)
+
     def my_account(self):
         """Returns logged in user info."""
         response = self._exec_request("GET", "/v2/accounts/me")
@@ -276,85 +1621,28 @@ class MyGregorApi:
 
     def get_devices(self, include_data: bool = False, include_zone: bool = False):
         """Returns list of all user's devices."""
-
-        include = []
-        if include_data:
-            include += ["device_data"]
-        if include_zone:
-            include += ["room_data"]
-        response = self._exec_request("GET", "/v2/devices?include=" + ",".join(include))
+        include = self._include(include_data, include_zone)
+        response = self._exec_request("GET", "/v2/devices?include=" + include)
 
         devices = []
-        for device in response["devices"]:
-            devices.append(self._set_device(device))
+        for data in response["devices"]:
+            device = self._set_device(data)
+            if device is not None:
+                devices.append(device)
 
         return devices
 
     def get_device(
         self, device_id: int, include_data: bool = True, include_zone: bool = False
     ):
-        """Returns device data."""
-
-        include = []
-        if include_data:
-            include += ["device_data"]
-        if include_zone:
-            include += ["room_data"]
+        """Returns device data or None if the device type is not supported."""
+        include = self._include(include_data, include_zone)
         response = self._exec_request(
-            "GET", f"/v2/devices/{device_id}?include=" + ",".join(include)
+            "GET", f"/v2/devices/{device_id}?include=" + include
         )
 
         return self._set_device(response)
 
-    def _set_device(self, data) -> MyGregorDevice:
-        if data["type"] == "Station":
-            device = MyGregorStation(
-                data["id"], data["name"], data["mac"], str(data["model"])
-            )
-        elif data["type"] == "Drive":
-            device = MyGregorDrive(
-                data["id"],
-                data["name"],
-                data["mac"],
-                str(data["model"]),
-            )
-        if "hardware_version" in data:
-            device.set_value("hw_version", data["hardware_version"])
-        if "software_version" in data:
-            device.set_value("sw_version", data["software_version"])
-        if "room" in data:
-            device.set_zone(data["room"]["id"], data["room"]["name"])
-        if "power_profile" in data:
-            device.set_value("power_profile", data["power_profile"])
-        if "position" in data:
-            device.set_value("position", data["position"])
-        if "status" in data:
-            device.set_value("state", data["status"])
-        else:
-            device.set_value("state", "Offline")
-        if "sensors_raw" in data:
-            sensors = data["sensors_raw"]
-            if "co2" in sensors:
-                device.set_value("co2", sensors["co2"])
-            if "temperature" in sensors:
-                device.set_value("temperature", sensors["temperature"])
-            if "humidity" in sensors:
-                device.set_value("humidity", sensors["humidity"])
-            if "rssi" in sensors:
-                device.set_value("rssi", sensors["rssi"])
-            if "noise" in sensors:
-                device.set_value("noise", sensors["noise"])
-            if "light" in sensors:
-                device.set_value("luminosity", sensors["light"])
-            if "radiation" in sensors:
-                device.set_value("radiation", sensors["radiation"])
-            if "battery_voltage" in sensors:
-                device.set_value("voltage", sensors["battery_voltage"])
-            if "battery_perc" in sensors:
-                device.set_value("battery_level", sensors["battery_perc"])
-
-        return device
-
     def get_zones(self, include_image: bool = False):
         """Returns user's zones (rooms)."""
         if include_image:
@@ -363,75 +1651,418 @@ class MyGregorApi:
             response = self._exec_request("GET", "/v2.1/rooms")
         return response["rooms"]
 
-    def get_zone_info(self, zone_id: int):
-        """Returns all available info about specific user's zone (room)."""
+    def get_zone_info(self, zone_id: int, include_image: bool = True):
+        """Returns all available info about specific user's zone (room).
+
+        The room image is the largest part of the response, leave it out with
+        include_image=False when only the devices are needed.
+        """
         response = self._exec_request(
-            "GET",
-            f"/v2/rooms/{zone_id}?include=image,power_profile,room_data,devices,device_data",
+            "GET", self._zone_endpoint(zone_id, include_image)
         )
         return response
 
+    def get_zone_devices(self, zone_id: int, include_image: bool = False):
+        """Returns every device of the zone with its data, with a single request."""
+        return self._zone_devices(self.get_zone_info(zone_id, include_image))
+
     def set_zone_state(self, zone_id: int, state: str):
         """open/close or set another action for specific zone"""
-        available_states = ("auto", "open", "close", "airing", "relax")
-        if state not in available_states:
-            raise MyGregorApiException(
-                f"Zone state can be one of the following {available_states}. Unknown state '{state}' is given."
-            )
+        self._check_zone_state(state)
         response = self._exec_request("PUT", f"/v2/rooms/{zone_id}", {"state": state})
+        self._zone_changed(zone_id)
         return response
 
     def open(self, drive_id: int):
         """open drive."""
-        # currently setting state is supported only for all drives in the zone, so we'll need this info:
-        device = self.get_device(drive_id, include_data=False, include_zone=True)
-        zone_id = device.zone_id
-        self.set_zone_state(zone_id, "open")
+        self._drive_command(drive_id, "open")
 
     def close(self, drive_id: int):
         """close drive."""
-        # currently setting state is supported only for all drives in the zone, so we'll need this info:
-        device = self.get_device(drive_id, include_data=False, include_zone=True)
-        zone_id = device.zone_id
-        self.set_zone_state(zone_id, "close")
+        self._drive_command(drive_id, "close")
+
+    def get_zone_id(self, drive_id: int):
+        """Returns the zone of the drive, from the index when possible."""
+        zone_id = self.zone_of(drive_id)
+        if zone_id is None:
+            zone_id = self.get_device(
+                drive_id, include_data=False, include_zone=True
+            ).zone_id
+        return zone_id
+
+    def _drive_command(self, drive_id: int, state: str):
+        """Sets the state of the drive's zone.
+
+        Currently setting state is supported only for all drives in the zone.
+        On 404 the zone is looked up again, the drive might have been moved.
+        """
+        cached = self.zone_of(drive_id) is not None
+        try:
+            return self.set_zone_state(self.get_zone_id(drive_id), state)
+        except NotFoundException:
+            if not cached:
+                raise
+        self.forget_zone(drive_id)
+        return self.set_zone_state(self.get_zone_id(drive_id), state)
 
     def _exec_request(self, method, endpoint, payload={}):
-        """Executes request against MyGregor API."""
+        """Executes request against MyGregor API.
+
+        GETs of rarely changing endpoints are answered from the response cache
+        when possible, a stale entry is refreshed in a background thread.
+        A GET of an endpoint (includes are part of it) that is already in flight
+        in another thread is not sent again, the caller waits for that request
+        and gets the same response, or exception. Cached and shared responses
+        must not be modified.
+        """
+        if method != "GET":
+            return self._request(method, endpoint, payload)
+        policy = self.cache.policy(endpoint)
+        if policy is None:
+            return self._shared_get(endpoint)
+        cached = self.cache.get(endpoint)
+        if cached is not None:
+            response, revalidate = cached
+            if revalidate:
+                threading.Thread(
+                    target=self._revalidate, args=(endpoint, policy), daemon=True
+                ).start()
+            return response
+        generation = self.cache.generation
+        response = self._shared_get(endpoint)
+        self.cache.put(endpoint, response, policy, generation)
+        return response
 
-        if not self._access_token:
-            raise UnauthorizedException("Access token not set")
+    def _revalidate(self, endpoint: str, policy) -> None:
+        """Refreshes a stale cache entry."""
+        generation = self.cache.generation
+        try:
+            response = self._shared_get(endpoint)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Refreshing %s failed: %s", endpoint, err)
+            self.cache.refresh_failed(endpoint)
+            return
+        self.cache.put(endpoint, response, policy, generation)
+
+    def _shared_get(self, endpoint):
+        """Sends the GET, or waits for the identical one in flight."""
+        with self._inflight_lock:
+            flight = self._inflight.get(endpoint)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[endpoint] = _Flight()
+                self.single_flight.misses += 1
+            else:
+                self.single_flight.hits += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = self._request("GET", endpoint, None)
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[endpoint]
+            flight.done.set()
+        return flight.result
+
+    def _request(self, method, endpoint, payload):
+        """Sends the request with retries and returns the decoded response.
+
+        The access token is renewed shortly before it expires, and once when it
+        is refused with 401, if login() was used.
+        """
+        if self._token_expiring():
+            self.refresh_token()
+        attempt = 0
+        renewed = False
+        while True:
+            token = self._access_token
+            url, headers, data = self._prepare_request(method, endpoint, payload)
+            trial = self._breaker.before_request()
+            try:
+                while (delay := self._throttle(method)) > 0:
+                    time.sleep(delay)
+                status, response_headers, body = self._send(
+                    method, url, data, headers
+                )
+                if status < 500:
+                    # The host answered, whatever it thought of the request
+                    self._breaker.record_success()
+                result = self._response(
+                    method, endpoint, url, data, status, body, response_headers
+                )
+            except UnauthorizedException:
+                if renewed or not self._can_login():
+                    raise
+                renewed = True
+                self.refresh_token(token)
+                continue
+            except Exception as err:  # pylint: disable=broad-except
+                delay = self._retry_delay(method, err, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+            else:
+                return result
+            finally:
+                if trial:
+                    self._breaker.end_trial()
+            attempt += 1
+
+
+class AsyncMyGregorApi(MyGregorApiBase):
+    """Asyncio interface for the MyGregor API.
+
+    Runs on the event loop and uses the given aiohttp session (or transport) for
+    all requests, so many requests can be in flight without tying up a thread
+    each.
+    """
+
+    TRANSIENT_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
 
-        url = BASE_URL + endpoint
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": "Bearer " + self._access_token,
-        }
-        data = None
-        if (method in ["POST", "PUT"]) and payload:
-            data = json.dumps(payload)
+    def __init__(
+        self,
+        session: aiohttp.ClientSession = None,
+        base_url: str = BASE_URL,
+        transport: AsyncTransport = None,
+    ) -> None:
+        """Constructor for asyncio MyGregor API class.
 
-        _LOGGER.debug("Accessing API %s with token", endpoint)
-        response = requests.request(method, url, data=data, headers=headers)
-        _LOGGER.debug("API %s response code: %s", endpoint, response.status_code)
+        Requests go over session unless another transport is given, one of
+        them is required.
+        """
+        super().__init__(base_url)
+        if session is None and transport is None:
+            raise TypeError(f"{type(self).__name__} needs a session or a transport")
+        self.transport = transport or AiohttpTransport(session)
+        self._check_transport(AsyncTransport)
+        self._login_lock = asyncio.Lock()
+        # Running cache refreshes
+        self._background = set()
+
+    async def _send(self, method, url, data, headers):
+        """Sends the request with the transport, returns status, headers and body."""
+        started = time.monotonic()
+        try:
+            status, response_headers, body = await self.transport.async_send(
+                method, url, data, headers
+            )
+        except Exception as err:
+            self.metrics.record(
+                method, url, type(err).__name__, time.monotonic() - started
+            )
+            raise
+        self.metrics.record(method, url, status, time.monotonic() - started, len(body))
+        return status, response_headers, body
+
+    async def login(self, username: str, password: str) -> bool:
+        """Try to obtain access_token."""
+        endpoint, headers, data = self._login_request(username, password)
+        status, _, body = await self._send(
+            "POST", self._base_url + endpoint, data, headers
+        )
+        return self._login_response(username, password, status, body)
+
+    async def refresh_token(self, rejected_token: str = None) -> None:
+        """Logs in again with the stored credentials.
+
+        Concurrent callers wait for one login instead of each logging in.
+        """
+        async with self._login_lock:
+            if self._refresh_needed(rejected_token):
+                _LOGGER.debug("Renewing access token")
+                await self.login(self._username, self._password)
+
+    async def my_account(self):
+        """Returns logged in user info."""
+        response = await self._exec_request("GET", "/v2/accounts/me")
+        return response
+
+    async def get_devices(
+        self, include_data: bool = False, include_zone: bool = False
+    ):
+        """Returns list of all user's devices."""
+        include = self._include(include_data, include_zone)
+        response = await self._exec_request("GET", "/v2/devices?include=" + include)
+
+        devices = (self._set_device(data) for data in response["devices"])
+        return [device for device in devices if device is not None]
+
+    async def get_device(
+        self, device_id: int, include_data: bool = True, include_zone: bool = False
+    ):
+        """Returns device data or None if the device type is not supported."""
+        include = self._include(include_data, include_zone)
+        response = await self._exec_request(
+            "GET", f"/v2/devices/{device_id}?include=" + include
+        )
 
+        return self._set_device(response)
+
+    async def get_zones(self, include_image: bool = False):
+        """Returns user's zones (rooms)."""
+        if include_image:
+            response = await self._exec_request("GET", "/v2.1/rooms?include=image")
+        else:
+            response = await self._exec_request("GET", "/v2.1/rooms")
+        return response["rooms"]
+
+    async def get_zone_info(self, zone_id: int, include_image: bool = True):
+        """Returns all available info about specific user's zone (room).
+
+        See MyGregorApi.get_zone_info.
+        """
+        response = await self._exec_request(
+            "GET", self._zone_endpoint(zone_id, include_image)
+        )
+        return response
+
+    async def get_zone_devices(self, zone_id: int, include_image: bool = False):
+        """Returns every device of the zone with its data, with a single request."""
+        return self._zone_devices(await self.get_zone_info(zone_id, include_image))
+
+    async def set_zone_state(self, zone_id: int, state: str):
+        """open/close or set another action for specific zone"""
+        self._check_zone_state(state)
+        response = await self._exec_request(
+            "PUT", f"/v2/rooms/{zone_id}", {"state": state}
+        )
+        self._zone_changed(zone_id)
+        return response
+
+    async def open(self, drive_id: int):
+        """open drive."""
+        await self.drive_command(drive_id, "open")
+
+    async def close(self, drive_id: int):
+        """close drive."""
+        await self.drive_command(drive_id, "close")
+
+    async def get_zone_id(self, drive_id: int):
+        """Returns the zone of the drive, from the index when possible."""
+        zone_id = self.zone_of(drive_id)
+        if zone_id is None:
+            device = await self.get_device(
+                drive_id, include_data=False, include_zone=True
+            )
+            zone_id = device.zone_id
+        return zone_id
+
+    async def drive_command(self, drive_id: int, state: str, set_zone_state=None):
+        """Sets the state of the drive's zone, see MyGregorApi._drive_command.
+
+        set_zone_state(zone_id, state) sends the zone state instead of
+        set_zone_state() of the client, e.g. to merge commands of a zone.
+        """
+        send = set_zone_state or self.set_zone_state
+        cached = self.zone_of(drive_id) is not None
         try:
-            error_msg = json.loads(response.text)["message"]
-        except json.JSONDecodeError:
-            error_msg = f"Error {response.status_code} executing {method} {endpoint} with {data}"
-        except KeyError:
-            error_msg = f"Error {response.status_code} executing {method} {endpoint} with {data}"
-
-        if response.status_code == 401:
-            raise UnauthorizedException(error_msg)
-        if response.status_code == 404:
-            raise MyGregorApiException(f"URL {url} Not Found")
-        if response.status_code != 200:
-            raise MyGregorApiException(response.status_code, error_msg)
-
-        data = response.json()
-        _LOGGER.debug("API %s %s returned: %s", method, endpoint, data)
+            return await send(await self.get_zone_id(drive_id), state)
+        except NotFoundException:
+            if not cached:
+                raise
+        self.forget_zone(drive_id)
+        return await send(await self.get_zone_id(drive_id), state)
+
+    async def _exec_request(self, method, endpoint, payload=None):
+        """Executes request against MyGregor API, see MyGregorApi._exec_request.
+
+        Stale cache entries are refreshed in a background task. Identical
+        concurrent GETs await one shared task, which keeps running when one of
+        its callers is cancelled.
+        """
+        if method != "GET":
+            return await self._request(method, endpoint, payload)
+        policy = self.cache.policy(endpoint)
+        if policy is None:
+            return await self._shared_get(endpoint)
+        cached = self.cache.get(endpoint)
+        if cached is not None:
+            response, revalidate = cached
+            if revalidate:
+                task = asyncio.ensure_future(self._revalidate(endpoint, policy))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return response
+        generation = self.cache.generation
+        response = await self._shared_get(endpoint)
+        self.cache.put(endpoint, response, policy, generation)
+        return response
 
-        return data
+    async def _revalidate(self, endpoint: str, policy) -> None:
+        """Refreshes a stale cache entry."""
+        generation = self.cache.generation
+        try:
+            response = await self._shared_get(endpoint)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.debug("Refreshing %s failed: %s", endpoint, err)
+            self.cache.refresh_failed(endpoint)
+            return
+        self.cache.put(endpoint, response, policy, generation)
+
+    async def _shared_get(self, endpoint):
+        """Sends the GET, or awaits the identical one in flight."""
+        task = self._inflight.get(endpoint)
+        if task is None:
+            self.single_flight.misses += 1
+            task = asyncio.ensure_future(self._request("GET", endpoint, None))
+            self._inflight[endpoint] = task
+            task.add_done_callback(lambda done: self._flight_done(endpoint, done))
+        else:
+            self.single_flight.hits += 1
+        return await asyncio.shield(task)
+
+    def _flight_done(self, endpoint: str, task: asyncio.Future) -> None:
+        """Forgets the finished GET, consuming its error if nobody awaits it."""
+        if self._inflight.get(endpoint) is task:
+            del self._inflight[endpoint]
+        if not task.cancelled():
+            task.exception()
+
+    async def _request(self, method, endpoint, payload):
+        """Sends the request with retries, see MyGregorApi._request."""
+        if self._token_expiring():
+            await self.refresh_token()
+        attempt = 0
+        renewed = False
+        while True:
+            token = self._access_token
+            url, headers, data = self._prepare_request(method, endpoint, payload)
+            trial = self._breaker.before_request()
+            try:
+                while (delay := self._throttle(method)) > 0:
+                    await asyncio.sleep(delay)
+                status, response_headers, body = await self._send(
+                    method, url, data, headers
+                )
+                if status < 500:
+                    # The host answered, whatever it thought of the request
+                    self._breaker.record_success()
+                result = self._response(
+                    method, endpoint, url, data, status, body, response_headers
+                )
+            except UnauthorizedException:
+                if renewed or not self._can_login():
+                    raise
+                renewed = True
+                await self.refresh_token(token)
+                continue
+            except Exception as err:  # pylint: disable=broad-except
+                delay = self._retry_delay(method, err, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            else:
+                return result
+            finally:
+                if trial:
+                    self._breaker.end_trial()
+            attempt += 1
 
 
 class UnauthorizedException(Exception):
@@ -440,3 +2071,33 @@ class UnauthorizedException(Exception):
 
 class MyGregorApiException(Exception):
     """Error to indicate global API Exception."""
+
+
+class NotFoundException(MyGregorApiException):
+    """Error to indicate the response code is 404."""
+
+
+class ServerErrorException(MyGregorApiException):
+    """Error to indicate the response code is 5xx."""
+
+
+class CircuitOpenException(MyGregorApiException):
+    """Error to indicate requests to the API host are paused after failures."""
+
+    def __init__(self, host: str, retry_in: float) -> None:
+        """Store seconds until the next trial request."""
+        super().__init__(f"Requests to {host} paused for {retry_in:.0f} s")
+        self.retry_in = retry_in
+
+
+class RateLimitedException(MyGregorApiException):
+    """Error to indicate the response code is 429."""
+
+    def __init__(self, retry_after: float) -> None:
+        """Store seconds the API asked to wait."""
+        super().__init__(429, f"Too many requests, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class CassetteMissException(MyGregorApiException):
+    """Request not found in the replayed cassette."""
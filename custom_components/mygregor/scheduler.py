@@ -0,0 +1,246 @@
+"""Adaptive per-device polling schedule for MyGregor devices."""
+from __future__ import annotations
+
+import time
+
+# Seconds between polls of a drive that is moving after a command
+FAST_INTERVAL = 5
+# Seconds between polls of a stable online device
+SLOW_INTERVAL = 60
+# Seconds a device counts as due early, the refresh timer fires on whole seconds
+DUE_TOLERANCE = 1
+# Seconds after a command when a drive is considered settled anyway
+MOVE_TIMEOUT = 90
+# Polls with unchanged position after which a moving drive is considered settled
+SETTLE_POLLS = 2
+# Weight of a new measurement in the learned speed of a drive
+SPEED_SMOOTHING = 0.3
+# Seconds after the expected end of a movement when the confirming poll is sent
+CONFIRM_MARGIN = 3
+
+
+class DeviceSchedule:
+    """Polling state of a single device."""
+
+    __slots__ = (
+        "next_due",
+        "interval",
+        "position",
+        "target",
+        "moving_until",
+        "moved",
+        "stable_polls",
+        "offline_polls",
+        "observed_at",
+        "speed",
+    )
+
+    def __init__(self, now: float) -> None:
+        """Create schedule, the device is due right away."""
+        self.next_due = now
+        self.interval = SLOW_INTERVAL
+        self.position = None
+        self.target = None
+        self.moving_until = None
+        self.moved = False
+        self.stable_polls = 0
+        self.offline_polls = 0
+        self.observed_at = None
+        # Learned drive speed in percent per second
+        self.speed = None
+
+    @property
+    def moving(self) -> bool:
+        """True while the device is polled fast after a command."""
+        return self.moving_until is not None
+
+
+class PollScheduler:
+    """Decides which devices have to be polled and when.
+
+    Drives are polled fast right after a command until their position settles,
+    every other device, online or offline, is polled slowly.
+
+    The speed of every drive is learned from the positions seen while it moves.
+    Once it is known, a command to a drive with a known target is followed by
+    a single confirming poll when the movement should be over, instead of fast
+    polls, and the position in between is estimated (see estimate).
+    """
+
+    def __init__(
+        self,
+        fast: float = FAST_INTERVAL,
+        slow: float = SLOW_INTERVAL,
+    ) -> None:
+        """Create scheduler."""
+        self._fast = fast
+        self._slow = slow
+        self._devices = {}
+
+    def _get(self, device_id: int, now: float) -> DeviceSchedule:
+        """Returns the schedule of the device, creating it if needed."""
+        if device_id not in self._devices:
+            self._devices[device_id] = DeviceSchedule(now)
+        return self._devices[device_id]
+
+    def forget(self, device_id: int) -> None:
+        """Stops scheduling a device which is gone."""
+        self._devices.pop(device_id, None)
+
+    def command_sent(self, device_id: int, target: int = None) -> None:
+        """A command was sent to the drive, poll it fast until it settles.
+
+        target is the expected final position, if known.
+        """
+        now = time.monotonic()
+        schedule = self._get(device_id, now)
+        schedule.target = target
+        schedule.moved = False
+        schedule.stable_polls = 0
+        # The drive starts from the last seen position now
+        schedule.observed_at = now
+        remaining = self._remaining(schedule)
+        if remaining is None:
+            schedule.moving_until = now + MOVE_TIMEOUT
+            schedule.interval = self._fast
+            schedule.next_due = now
+        else:
+            schedule.moving_until = now + max(MOVE_TIMEOUT, 2 * remaining)
+            schedule.interval = remaining + CONFIRM_MARGIN
+            schedule.next_due = now + schedule.interval
+
+    def observe(self, device) -> None:
+        """Updates the schedule of the device from freshly fetched data."""
+        now = time.monotonic()
+        schedule = self._get(device.unique_id, now)
+        position = getattr(device, "position", None)
+
+        if device.state != "Online":
+            schedule.moving_until = None
+            schedule.offline_polls += 1
+            schedule.interval = self._slow
+        elif schedule.moving:
+            self._learn_speed(schedule, position, now)
+            if position == schedule.position:
+                schedule.stable_polls += 1
+            else:
+                schedule.moved = schedule.position is not None
+                schedule.stable_polls = 0
+            if (
+                (schedule.target is not None and position == schedule.target)
+                or (schedule.moved and schedule.stable_polls >= SETTLE_POLLS)
+                or now >= schedule.moving_until
+            ):
+                schedule.moving_until = None
+                schedule.interval = self._slow
+            else:
+                schedule.position = position
+                remaining = self._remaining(schedule)
+                if remaining is None:
+                    schedule.interval = self._fast
+                else:
+                    schedule.interval = max(remaining + CONFIRM_MARGIN, self._fast)
+        else:
+            schedule.offline_polls = 0
+            schedule.interval = self._slow
+
+        schedule.position = position
+        schedule.observed_at = now
+        schedule.next_due = now + schedule.interval
+
+    @staticmethod
+    def _learn_speed(schedule: DeviceSchedule, position, now: float) -> None:
+        """Updates the speed of a moving drive from its new position.
+
+        A drive seen short of its target was moving the whole time since the
+        last position, which gives its speed. A drive already at its target
+        went at least as fast as that, which only raises a too low estimate.
+        """
+        if (
+            position is None
+            or schedule.position is None
+            or schedule.observed_at is None
+            or position == schedule.position
+            or now <= schedule.observed_at
+        ):
+            return
+        speed = abs(position - schedule.position) / (now - schedule.observed_at)
+        if position == schedule.target:
+            if schedule.speed is not None and speed > schedule.speed:
+                schedule.speed = speed
+        elif schedule.speed is None:
+            schedule.speed = speed
+        else:
+            schedule.speed += SPEED_SMOOTHING * (speed - schedule.speed)
+
+    @staticmethod
+    def _remaining(schedule: DeviceSchedule) -> float | None:
+        """Seconds the drive needs from its last position to the target."""
+        if (
+            schedule.speed is None
+            or schedule.target is None
+            or schedule.position is None
+        ):
+            return None
+        return abs(schedule.target - schedule.position) / schedule.speed
+
+    def estimate(self, device_id: int):
+        """Returns the estimated position and seconds left of a moving drive.
+
+        None when the drive is not moving or its speed or target is unknown.
+        """
+        schedule = self._devices.get(device_id)
+        if schedule is None or not schedule.moving:
+            return None
+        remaining = self._remaining(schedule)
+        if remaining is None:
+            return None
+        elapsed = time.monotonic() - schedule.observed_at
+        if elapsed >= remaining:
+            return schedule.target, 0.0
+        step = schedule.speed * elapsed
+        if schedule.target < schedule.position:
+            step = -step
+        return round(schedule.position + step), remaining - elapsed
+
+    def due(self):
+        """Returns IDs of the devices that have to be polled now.
+
+        Devices due within DUE_TOLERANCE are included, so a refresh fired a
+        little early still finds the device it was scheduled for.
+        """
+        now = time.monotonic() + DUE_TOLERANCE
+        return [
+            device_id
+            for device_id, schedule in self._devices.items()
+            if schedule.next_due <= now
+        ]
+
+    def is_moving(self, device_id: int) -> bool:
+        """True while the device is polled fast after a command."""
+        schedule = self._devices.get(device_id)
+        return schedule is not None and schedule.moving
+
+    def moving(self):
+        """Returns IDs of the devices polled fast after a command."""
+        return [
+            device_id
+            for device_id, schedule in self._devices.items()
+            if schedule.moving
+        ]
+
+    def offline(self):
+        """Returns IDs of the devices seen offline."""
+        return [
+            device_id
+            for device_id, schedule in self._devices.items()
+            if schedule.offline_polls
+        ]
+
+    def next_delay(self) -> float:
+        """Seconds until the next device is due."""
+        if not self._devices:
+            return self._slow
+        now = time.monotonic()
+        next_due = min(schedule.next_due for schedule in self._devices.values())
+        return max(next_due - now, 1)
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 import voluptuous as vol
 
@@ -24,21 +23,25 @@ from homeassistant.const import (
     LIGHT_LUX,
     # SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     CONCENTRATION_PARTS_PER_MILLION,
-    # ENTITY_CATEGORY_DIAGNOSTIC,
+    DATA_KILOBYTES,
+    ENTITY_CATEGORY_DIAGNOSTIC,
+    TIME_MILLISECONDS,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.components.sensor import (
     STATE_CLASS_MEASUREMENT,
+    STATE_CLASS_TOTAL_INCREASING,
     SensorEntity,
 )
+from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from .const import DOMAIN, ATTR_RADIATION, ATTR_HW_VER, ATTR_NOISE
 
 from .entity import MyGregorDevice
+from .history import STATS_INTERVAL, RollingStats
 
 _LOGGER = logging.getLogger(__name__)
-# Time between updating data from api.mygregor.com
-SCAN_INTERVAL = timedelta(seconds=60)
 
 # Validation of the user's configuration
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
@@ -56,79 +59,105 @@ async def async_setup_entry(
     """Setup sensors from a config entry created in the integrations UI."""
 
     registry = hass.data[DOMAIN]["registry"][config_entry.entry_id]
-    api_devices = [registry.api_devices]
     sensors = []
-    for device in api_devices:
-        if device.device_type == "Drive":
-            sensor = MyGNoiseSensor(
-                mac=device.mac, name=f"{device.name} Noise", value=device.noise
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGPositionSensor(
-                mac=device.mac, name=f"{device.name} Position", value=device.position
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-        elif device.device_type == "Station":
-            station = MyGregorStation(device, registry)
-            sensors += [station]
-
-            sensor = MyGTemperatureSensor(
-                mac=device.mac,
-                name=f"{device.name} Temperature",
-                value=device.temperature,
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGHumiditySensor(
-                mac=device.mac, name=f"{device.name} Humidity", value=device.humidity
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGCO2Sensor(
-                mac=device.mac,
-                name=f"{device.name} CO₂",
-                value=device.co2,
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGLuminositySensor(
-                mac=device.mac,
-                name=f"{device.name} Luminosity",
-                value=device.luminosity,
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGNoiseSensor(
-                mac=device.mac, name=f"{device.name} Noise", value=device.noise
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
-
-            sensor = MyGRadiationSensor(
-                mac=device.mac, name=f"{device.name} Radiation", value=device.radiation
-            )
-            registry.add_sensor(device.mac, sensor)
-            sensors += [sensor]
+    for device in registry.api_devices:
+        sensors += _device_sensors(device, registry)
 
+    # Counters of the account's API client, once per entry
+    api_device = None if registry.account else registry.api_devices[0]
+    sensors += [
+        MyGApiSensor(registry.coordinator, config_entry, api_device, *description)
+        for description in API_SENSORS
+    ]
+
+    registry.add_platform(_device_sensors, async_add_entities)
     async_add_entities(sensors)
 
 
+def _device_sensors(device, registry) -> list:
+    """Creates the station entity and the child sensors of a device."""
+    sensors = []
+    if device.device_type == "Drive":
+        sensor = MyGNoiseSensor(
+            mac=device.mac, name=f"{device.name} Noise", value=device.noise
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGPositionSensor(
+            mac=device.mac, name=f"{device.name} Position", value=device.position
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+    elif device.device_type == "Station":
+        station = MyGregorStation(device, registry)
+        sensors += [station]
+
+        sensor = MyGTemperatureSensor(
+            mac=device.mac,
+            name=f"{device.name} Temperature",
+            value=device.temperature,
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGHumiditySensor(
+            mac=device.mac, name=f"{device.name} Humidity", value=device.humidity
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGCO2Sensor(
+            mac=device.mac,
+            name=f"{device.name} CO₂",
+            value=device.co2,
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGLuminositySensor(
+            mac=device.mac,
+            name=f"{device.name} Luminosity",
+            value=device.luminosity,
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGNoiseSensor(
+            mac=device.mac, name=f"{device.name} Noise", value=device.noise
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        sensor = MyGRadiationSensor(
+            mac=device.mac, name=f"{device.name} Radiation", value=device.radiation
+        )
+        registry.add_sensor(device.mac, sensor)
+        sensors += [sensor]
+
+        for device_class, stats in station.history.items():
+            registry.get_sensor(device.mac, device_class).stats = stats
+
+    return sensors
+
+
 class MyGregorStation(MyGregorDevice, SensorEntity):
     """Representation of a MyGregor station device."""
 
+    # Child sensors with rolling statistics and the device property they show
+    HISTORY = {
+        DEVICE_CLASS_CO2: "co2",
+        DEVICE_CLASS_TEMPERATURE: "temperature",
+        DEVICE_CLASS_HUMIDITY: "humidity",
+        ATTR_NOISE: "noise",
+        ATTR_RADIATION: "radiation",
+    }
+
     def __init__(self, device, registry) -> None:
         """Initialize station."""
-        super().__init__(device)
-        self.registry = registry
-        self._id = int(device.unique_id)
+        super().__init__(device, registry)
+        self.history = {device_class: RollingStats() for device_class in self.HISTORY}
         self._value = device.state
         self._unique_id = "MyGregor" + device.device_type + "_" + format_mac(device.mac)
         if device.state == "Online":
@@ -175,7 +204,7 @@ class MyGregorStation(MyGregorDevice, SensorEntity):
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self._available
+        return self._available and self.coordinator.last_update_success
 
     @property
     def native_value(self) -> int:
@@ -187,43 +216,54 @@ class MyGregorStation(MyGregorDevice, SensorEntity):
         """Return true if sensor state is on."""
         return self._value == "Online"
 
-    def update(self) -> None:
-        """Fetch new state data for this device.
+    def _observe(self, device) -> None:
+        """Add the readings of every fetch to the rolling statistics.
 
-        This is the only method that should fetch new data for Home Assistant.
+        The readings are passed to the child sensors here, once per fetch, as
+        the statistics change even when the readings do not. A child sensor
+        whose reading is held back by its deadband refreshes its statistics
+        at most every STATS_INTERVAL (see MyGSensor.refresh_stats).
         """
-        device = self.registry.api.get_device(self._id, include_data=True)
+        for device_class, prop in self.HISTORY.items():
+            self.history[device_class].add(getattr(device, prop))
+        self._publish(device)
+
+    def _set_device(self, device) -> None:
+        """Apply the state data fetched by the coordinator for this device."""
         self.extra_attrs[ATTR_HW_VER] = device.hardware_version
         self.extra_attrs[ATTR_SW_VERSION] = device.software_version
         self.extra_attrs[DEVICE_CLASS_SIGNAL_STRENGTH] = device.rssi
 
-        mac = self.device.mac
         if device.state == "Online":
             self._value = "Online"
             self._available = True
-            self.registry.set_sensor_value(
-                mac, DEVICE_CLASS_TEMPERATURE, device.temperature
-            )
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_HUMIDITY, device.humidity)
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_CO2, device.co2)
-            self.registry.set_sensor_value(
-                mac, DEVICE_CLASS_ILLUMINANCE, device.luminosity
-            )
-            self.registry.set_sensor_value(mac, ATTR_NOISE, device.noise)
-            self.registry.set_sensor_value(mac, ATTR_RADIATION, device.radiation)
         else:
             self._value = "Offline"
             self._available = False
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_TEMPERATURE, None)
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_HUMIDITY, None)
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_CO2, None)
-            self.registry.set_sensor_value(mac, DEVICE_CLASS_ILLUMINANCE, None)
-            self.registry.set_sensor_value(mac, ATTR_NOISE, None)
-            self.registry.set_sensor_value(mac, ATTR_RADIATION, None)
+
+    def _publish(self, device) -> None:
+        """Pass the readings to the child sensors, the changed ones are written."""
+        values = {
+            DEVICE_CLASS_TEMPERATURE: device.temperature,
+            DEVICE_CLASS_HUMIDITY: device.humidity,
+            DEVICE_CLASS_CO2: device.co2,
+            DEVICE_CLASS_ILLUMINANCE: device.luminosity,
+            ATTR_NOISE: device.noise,
+            ATTR_RADIATION: device.radiation,
+        }
+        if device.state != "Online":
+            values = dict.fromkeys(values)
+        self.registry.set_sensor_values(self.device.mac, values)
 
 
 class MyGSensor(SensorEntity):
-    """Representation of a MyGregor sensor."""
+    """Representation of a MyGregor sensor.
+
+    The parent device pushes the values, see MyGregorRegistry.set_sensor_values,
+    which holds back changes within the deadband (DeadbandFilter) of the sensor.
+    """
+
+    _attr_should_poll = False
 
     def __init__(self, mac, name, device_class, value) -> None:
         """Initialize an Sensor."""
@@ -232,6 +272,10 @@ class MyGSensor(SensorEntity):
         self._value = value
         self._id = "MyGregor_" + format_mac(mac) + "_" + device_class
         self._available = True
+        self._attributes = None
+        self.stats = None
+        self._stats_at = None
+        self.deadband = None
 
     @property
     def unique_id(self):
@@ -243,6 +287,10 @@ class MyGSensor(SensorEntity):
         """Return the display name of the sensor."""
         return self._name
 
+    def set_name(self, name: str) -> None:
+        """Parent device was renamed."""
+        self._name = name
+
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
@@ -263,18 +311,47 @@ class MyGSensor(SensorEntity):
         """Return the class of this entity."""
         return STATE_CLASS_MEASUREMENT
 
-    def set_value(self, value):
-        """Parent device is updating the state."""
-        self._value = value
-        if value is not None:
+    @property
+    def extra_state_attributes(self):
+        """Return the rolling statistics (RollingStats) of the sensor, if kept."""
+        return self._attributes
+
+    def apply(self, value, now: float) -> bool:
+        """Take a value from the parent device, True if the state has to be written.
+
+        None makes the sensor unavailable and keeps the last value. now is the
+        monotonic time of the reading.
+        """
+        if value is None:
+            changed = self._available
+            self._available = False
+        else:
+            changed = not self._available or value != self._value
+            self._value = value
             self._available = True
+        if self.stats is not None:
+            changed = self._update_stats(now) or changed
+        return changed
 
-    def set_available(self, value: bool):
-        """Parent device is setting availability on or off."""
-        self._available = value
+    def refresh_stats(self, now: float) -> bool:
+        """Update the statistics of a sensor whose value was held back.
 
-    def update(self) -> None:
-        """Update does nothing since the device shall update the state."""
+        True if the state has to be written, at most once per STATS_INTERVAL.
+        """
+        if self.stats is None or (
+            self._stats_at is not None and now - self._stats_at < STATS_INTERVAL
+        ):
+            return False
+        return self._update_stats(now)
+
+    def _update_stats(self, now: float) -> bool:
+        """Take the attributes from the rolling statistics, True if they changed."""
+        self._stats_at = now
+        attributes = self.stats.as_attributes()
+        if attributes == self._attributes:
+            return False
+        self._attributes = attributes
+        return True
 
 
 class MyGNoiseSensor(MyGSensor):
@@ -388,6 +465,91 @@ class MyGLuminositySensor(MyGSensor):
         return LIGHT_LUX
 
 
+def _latency_ms(metrics):
+    """Average request duration in milliseconds."""
+    latency = metrics.latency_avg
+    return round(latency * 1000) if latency is not None else None
+
+
+# Key, name, unit, state class, icon and value of the API metrics sensors
+API_SENSORS = (
+    (
+        "api_requests",
+        "API requests",
+        None,
+        STATE_CLASS_TOTAL_INCREASING,
+        "mdi:cloud-upload",
+        lambda metrics: metrics.requests,
+    ),
+    (
+        "api_errors",
+        "API errors",
+        None,
+        STATE_CLASS_TOTAL_INCREASING,
+        "mdi:cloud-alert",
+        lambda metrics: metrics.errors,
+    ),
+    (
+        "api_latency",
+        "API latency",
+        TIME_MILLISECONDS,
+        STATE_CLASS_MEASUREMENT,
+        "mdi:timer-outline",
+        _latency_ms,
+    ),
+    (
+        "api_received",
+        "API data received",
+        DATA_KILOBYTES,
+        STATE_CLASS_TOTAL_INCREASING,
+        "mdi:cloud-download",
+        lambda metrics: round(metrics.bytes_received / 1024),
+    ),
+)
+
+
+class MyGApiSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor with a counter of the account's API client.
+
+    Disabled by default, the values are shared by all devices of the account.
+    """
+
+    _attr_entity_category = ENTITY_CATEGORY_DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self, coordinator, entry, device, key, name, unit, state_class, icon, value
+    ) -> None:
+        """Initialize an API sensor attached to the given device.
+
+        Without a device (account-level entries) the sensor belongs to the entry.
+        """
+        super().__init__(coordinator)
+        self._value = value
+        if device is not None:
+            self._attr_unique_id = "MyGregor_" + format_mac(device.mac) + "_" + key
+            self._attr_name = f"{device.name} {name}"
+            self._attr_device_info = {
+                "connections": {(CONNECTION_NETWORK_MAC, device.mac)}
+            }
+        else:
+            self._attr_unique_id = "MyGregor_" + entry.entry_id + "_" + key
+            self._attr_name = f"{entry.title} {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+        self._attr_icon = icon
+
+    @property
+    def available(self) -> bool:
+        """API counters are available even when the last update failed."""
+        return True
+
+    @property
+    def native_value(self):
+        """Return the current value of the counter."""
+        return self._value(self.coordinator.api.metrics)
+
+
 # class MyGRSSISensor(MyGSensor):
 #     """Representation of a MyGregor RSSI sensor."""
 
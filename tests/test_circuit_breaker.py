@@ -0,0 +1,138 @@
+"""Tests of the circuit breaker's half-open trial request."""
+import asyncio
+import weakref
+
+import pytest
+
+from mygregorpy import (
+    AsyncMyGregorApi,
+    CircuitBreaker,
+    CircuitOpenException,
+    FakeTransport,
+    MyGregorApi,
+    MyGregorApiException,
+    NotFoundException,
+    RateLimiter,
+    UnauthorizedException,
+)
+
+URL = "http://cloud.test"
+DEVICES = {"devices": []}
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """Every test gets its own breakers, limiters without pacing and no backoff."""
+    monkeypatch.setattr(CircuitBreaker, "_breakers", {})
+    monkeypatch.setattr(CircuitBreaker, "reset_timeout", 0)
+    monkeypatch.setattr(RateLimiter, "_limiters", weakref.WeakValueDictionary())
+    monkeypatch.setattr(RateLimiter, "rate", 1e9)
+    monkeypatch.setattr(RateLimiter, "burst", 1e9)
+    monkeypatch.setattr(MyGregorApi, "retry_backoff", 0)
+    monkeypatch.setattr(MyGregorApi, "max_retries", 0)
+
+
+def responses(*answers):
+    """Handler answering with the given (status, payload, headers) in turn."""
+    answers = list(answers)
+
+    def handler(method, path, query, data, headers):
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+
+    return handler
+
+
+def open_circuit(api):
+    """Fails requests until the host's circuit is open."""
+    breaker = api.circuit_breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    assert breaker.is_open
+    return breaker
+
+
+def make_api(*answers):
+    """Blocking client answered by the handler."""
+    api = MyGregorApi(base_url=URL, transport=FakeTransport(responses(*answers)))
+    api.set_access_token("token")
+    return api
+
+
+@pytest.mark.parametrize(
+    "status, headers, error",
+    [
+        (404, {}, NotFoundException),
+        (401, {}, UnauthorizedException),
+        (400, {}, MyGregorApiException),
+    ],
+)
+def test_trial_client_error_closes_circuit(status, headers, error):
+    """A 4xx answer shows the host is back."""
+    api = make_api((status, {"message": "no"}, headers), (200, DEVICES, {}))
+    breaker = open_circuit(api)
+
+    with pytest.raises(error):
+        api.get_devices(include_data=True)
+
+    assert not breaker.is_open
+    assert api.get_devices(include_data=True) == []
+
+
+def test_trial_rate_limited_closes_circuit():
+    """429 on the trial closes the circuit, the retry goes through."""
+    api = make_api((429, {}, {"Retry-After": "0"}), (200, DEVICES, {}))
+    breaker = open_circuit(api)
+
+    assert api.get_devices(include_data=True) == []
+    assert not breaker.is_open
+
+
+def test_trial_server_error_reopens_circuit(monkeypatch):
+    """5xx on the trial opens the circuit for another timeout."""
+    api = make_api((503, {"message": "down"}, {}))
+    breaker = open_circuit(api)
+    monkeypatch.setattr(CircuitBreaker, "reset_timeout", 60)
+
+    with pytest.raises(MyGregorApiException):
+        api.get_devices(include_data=True)
+
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenException):
+        api.get_devices(include_data=True)
+
+
+def test_cancelled_trial_lets_next_trial_through():
+    """A trial cancelled before any answer does not block later trials.
+
+    A command is used, GETs are shared and shielded from their callers.
+    """
+
+    class StalledTransport(FakeTransport):
+        """Never answers the first request."""
+
+        def __init__(self):
+            super().__init__(responses((200, {"id": 1, "state": "open"}, {})))
+            self.stalled = False
+
+        async def async_send(self, method, url, data, headers):
+            if not self.stalled:
+                self.stalled = True
+                await asyncio.Event().wait()
+            return await super().async_send(method, url, data, headers)
+
+    async def run():
+        api = AsyncMyGregorApi(base_url=URL, transport=StalledTransport())
+        api.set_access_token("token")
+        breaker = open_circuit(api)
+
+        task = asyncio.ensure_future(api.set_zone_state(1, "open"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert breaker.is_open
+        await api.set_zone_state(1, "open")
+        assert not breaker.is_open
+
+    asyncio.run(run())
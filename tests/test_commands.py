@@ -0,0 +1,85 @@
+"""Tests of zone command coalescing."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.mygregor.commands import (  # noqa: E402
+    CommandSuperseded,
+    ZoneCommandQueue,
+)
+
+
+class Api:
+    """Records the zone states set."""
+
+    def __init__(self, error=None):
+        self.sent = []
+        self.error = error
+
+    async def set_zone_state(self, zone_id, state):
+        self.sent.append((zone_id, state))
+        if self.error is not None:
+            raise self.error
+        return {"id": zone_id, "state": state}
+
+
+def run_commands(api, *commands):
+    """Sends the (zone, state) commands at once, returns their outcomes and queue."""
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        queue = ZoneCommandQueue(hass, api, delay=0.01)
+        results = await asyncio.gather(
+            *(queue.async_set_zone_state(zone, state) for zone, state in commands),
+            return_exceptions=True,
+        )
+        return results, queue
+
+    return asyncio.run(run())
+
+
+def test_same_state_merged_per_zone():
+    """Commands for the same zone and state share one request."""
+    api = Api()
+    results, queue = run_commands(
+        api, (1, "open"), (1, "open"), (2, "open"), (1, "open")
+    )
+
+    assert sorted(api.sent) == [(1, "open"), (2, "open")]
+    assert results[0] is results[1]
+    assert results[0] == {"id": 1, "state": "open"}
+    assert queue.as_dict() == {
+        "requested": 4,
+        "sent": 2,
+        "saved": 2,
+        "superseded": 0,
+    }
+
+
+def test_other_state_supersedes():
+    """The last state wins, callers of the earlier one get CommandSuperseded."""
+    api = Api()
+    results, queue = run_commands(api, (1, "open"), (1, "open"), (1, "close"))
+
+    assert api.sent == [(1, "close")]
+    assert isinstance(results[0], CommandSuperseded)
+    assert isinstance(results[1], CommandSuperseded)
+    assert results[2] == {"id": 1, "state": "close"}
+    assert queue.as_dict() == {
+        "requested": 3,
+        "sent": 1,
+        "saved": 0,
+        "superseded": 2,
+    }
+
+
+def test_error_reaches_every_caller():
+    """An error of the shared request is raised to every merged caller."""
+    error = RuntimeError("down")
+    results, _ = run_commands(Api(error), (1, "open"), (1, "open"))
+
+    assert results == [error, error]
@@ -0,0 +1,242 @@
+"""Tests of choosing between fleet, zone and device polls in the coordinator."""
+import asyncio
+from types import SimpleNamespace
+import weakref
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.mygregor import coordinator, scheduler  # noqa: E402
+from custom_components.mygregor.mygregorpy import (  # noqa: E402
+    AsyncMyGregorApi,
+    CircuitBreaker,
+    FakeTransport,
+    MyGregorApiBase,
+    RateLimiter,
+)
+from custom_components.mygregor.scheduler import (  # noqa: E402
+    CONFIRM_MARGIN,
+    FAST_INTERVAL,
+    SLOW_INTERVAL,
+)
+
+URL = "http://cloud.test"
+# Device ID -> room ID, drives have odd IDs
+ROOMS = {1: 10, 3: 10, 5: 20, 7: 30, 9: 40, 2: 20}
+
+
+class Clock:
+    """Monotonic clock moved by the test."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Cloud:
+    """Answers device and room requests from positions set by the test."""
+
+    def __init__(self):
+        self.positions = dict.fromkeys(ROOMS, 0)
+        self.requests = []
+
+    def device(self, device_id):
+        room_id = ROOMS[device_id]
+        data = {
+            "id": device_id,
+            "name": f"Device {device_id}",
+            "mac": f"aa:bb:cc:dd:ee:{device_id:02x}",
+            "model": 1,
+            "status": "Online",
+            "room": {"id": room_id, "name": f"Room {room_id}"},
+        }
+        if device_id % 2:
+            data.update(type="Drive", position=self.positions[device_id])
+        else:
+            data.update(type="Station", sensors_raw={"temperature": 21.5})
+        return data
+
+    def __call__(self, method, path, query, data, headers):
+        self.requests.append(f"{method} {path}")
+        parts = path.split("/")
+        if path == "/v2/devices":
+            return 200, {"devices": [self.device(i) for i in ROOMS]}, {}
+        if path.startswith("/v2/rooms/"):
+            room_id = int(parts[-1])
+            devices = [self.device(i) for i, room in ROOMS.items() if room == room_id]
+            room = {"id": room_id, "name": f"Room {room_id}", "devices": devices}
+            return 200, room, {}
+        if path.startswith("/v2/devices/"):
+            return 200, self.device(int(parts[-1])), {}
+        return 404, {"message": "Not found"}, {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clocks of the coordinator and the scheduler."""
+    clock = Clock()
+    monkeypatch.setattr(coordinator, "time", clock)
+    monkeypatch.setattr(scheduler, "time", clock)
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def no_pacing(monkeypatch):
+    """Limiters without pacing, own breakers and no retries."""
+    monkeypatch.setattr(CircuitBreaker, "_breakers", {})
+    monkeypatch.setattr(RateLimiter, "_limiters", weakref.WeakValueDictionary())
+    monkeypatch.setattr(RateLimiter, "rate", 1e9)
+    monkeypatch.setattr(RateLimiter, "burst", 1e9)
+    monkeypatch.setattr(MyGregorApiBase, "max_retries", 0)
+
+
+class Account:
+    """A coordinator answered by the cloud, refreshed on request by the test."""
+
+    def __init__(self, loop):
+        self.cloud = Cloud()
+        api = AsyncMyGregorApi(base_url=URL, transport=FakeTransport(self.cloud))
+        api.set_access_token("token")
+        hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        cache = SimpleNamespace(async_save=lambda data: None)
+        self.coordinator = coordinator.MyGregorCoordinator(hass, api, cache)
+        self.coordinator.async_request_refresh = self.refresh
+        self.rescheduled = []
+        self.coordinator._schedule_refresh = lambda: self.rescheduled.append(
+            self.delay()
+        )
+        self.coordinator.async_add_listener(lambda: None)
+        self.rescheduled.clear()
+
+    async def refresh(self):
+        """Runs an update and returns the requests it sent."""
+        sent = len(self.cloud.requests)
+        self.coordinator.data = await self.coordinator._async_update_data()
+        return self.cloud.requests[sent:]
+
+    async def command(self, drive_id, state):
+        """Tells the coordinator a command was sent, returns the requests sent."""
+        sent = len(self.cloud.requests)
+        await self.coordinator.async_command_sent(drive_id, state)
+        return self.cloud.requests[sent:]
+
+    def delay(self):
+        """Seconds until the next refresh."""
+        return self.coordinator.update_interval.total_seconds()
+
+
+def run(test):
+    """Runs the test coroutine with a fresh account."""
+
+    async def main():
+        await test(Account(asyncio.get_running_loop()))
+
+    asyncio.run(main())
+
+
+def test_first_refresh_polls_fleet(clock):
+    """The first refresh fetches every device with one request."""
+
+    async def test(account):
+        assert await account.refresh() == ["GET /v2/devices"]
+        assert set(account.coordinator.data) == set(ROOMS)
+        assert account.delay() == pytest.approx(SLOW_INTERVAL)
+
+    run(test)
+
+
+def test_nothing_due_sends_nothing(clock):
+    """A refresh before anything is due keeps the data and reschedules."""
+
+    async def test(account):
+        await account.refresh()
+        data = account.coordinator.data
+        clock.now += 10
+
+        assert await account.refresh() == []
+        assert account.coordinator.data is data
+        assert account.delay() == pytest.approx(SLOW_INTERVAL - 10)
+
+    run(test)
+
+
+def test_command_without_speed_polls_zone(clock):
+    """Drives of the zone are polled right away and fast, with one zone request."""
+
+    async def test(account):
+        await account.refresh()
+
+        assert await account.command(1, "open") == ["GET /v2/rooms/10"]
+        assert account.delay() == pytest.approx(FAST_INTERVAL)
+
+    run(test)
+
+
+def test_early_timer_polls_zone_not_fleet(clock):
+    """A refresh fired a little before the drive is due still polls its zone."""
+
+    async def test(account):
+        await account.refresh()
+        await account.command(1, "open")
+        clock.now += FAST_INTERVAL - 0.5
+
+        assert await account.refresh() == ["GET /v2/rooms/10"]
+
+    run(test)
+
+
+def test_command_with_learned_speed_waits_for_confirming_poll(clock):
+    """With known speeds nothing is fetched, the refresh moves to the confirm poll."""
+
+    async def test(account):
+        await account.refresh()
+        await account.command(1, "open")
+        for position in (50, 100):
+            clock.now += account.delay()
+            account.cloud.positions.update({1: position, 3: position})
+            await account.refresh()
+        assert not account.coordinator.scheduler.moving()
+        clock.now += 10
+
+        assert await account.command(1, "close") == []
+        # 10 % per second learned
+        assert account.delay() == pytest.approx(100 / 10 + CONFIRM_MARGIN)
+        assert account.rescheduled == [account.delay()]
+
+        clock.now += account.delay()
+        assert await account.refresh() == ["GET /v2/rooms/10"]
+
+    run(test)
+
+
+def test_fleet_polled_every_slow_interval(clock):
+    """Zone polls of moving drives do not put off the fleet poll."""
+
+    async def test(account):
+        await account.refresh()
+        await account.command(1, "open")
+        requests = []
+        for _ in range(SLOW_INTERVAL // FAST_INTERVAL):
+            clock.now += FAST_INTERVAL
+            requests += await account.refresh()
+
+        assert requests.count("GET /v2/devices") == 1
+        assert requests[-1] == "GET /v2/devices"
+
+    run(test)
+
+
+def test_many_zones_due_polls_fleet(clock):
+    """More requests than FLEET_THRESHOLD are replaced by one fleet poll."""
+
+    async def test(account):
+        await account.refresh()
+        for drive_id in (1, 5, 7, 9):
+            account.coordinator.scheduler.command_sent(drive_id, 100)
+
+        assert await account.refresh() == ["GET /v2/devices"]
+
+    run(test)
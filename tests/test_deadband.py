@@ -0,0 +1,88 @@
+"""Tests of the deadbands holding back insignificant sensor changes."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.mygregor.deadband import (  # noqa: E402
+    Deadband,
+    DeadbandFilter,
+    DeadbandStats,
+)
+
+
+def test_absolute_threshold():
+    """Changes reaching the threshold pass, rounding errors included."""
+    deadband = Deadband(absolute=0.1)
+
+    assert deadband.significant(21.5, 21.4)
+    assert deadband.significant(21.5, 21.6)
+    assert not deadband.significant(21.5, 21.55)
+    assert not deadband.significant(21.5, 21.5)
+
+
+def test_relative_threshold():
+    """The larger of the absolute and the relative threshold applies."""
+    deadband = Deadband(absolute=20, relative=0.02)
+
+    assert not deadband.significant(1500, 1525)
+    assert deadband.significant(1500, 1530)
+    assert deadband.significant(400, 420)
+
+
+def test_filter_compares_with_last_passed():
+    """A slow drift passes once it adds up."""
+    held = DeadbandFilter(Deadband(absolute=1))
+
+    assert held.passes(45.0, 0)
+    assert not held.passes(45.4, 60)
+    assert not held.passes(45.8, 120)
+    assert held.passes(46.2, 180)
+    assert held.value == 46.2
+
+
+def test_filter_heartbeat():
+    """An unchanged reading is written again after the heartbeat."""
+    held = DeadbandFilter(Deadband(absolute=1, heartbeat=900))
+    held.passes(45, 0)
+
+    assert not held.passes(45, 899)
+    assert held.passes(45, 900)
+
+
+def test_filter_unavailable_passes():
+    """None passes and lets the next reading through."""
+    held = DeadbandFilter(Deadband(absolute=1))
+    held.passes(45, 0)
+
+    assert held.passes(None, 60)
+    assert held.passes(45, 120)
+
+
+def test_filter_held_change_once():
+    """Only a held back reading that differs from the one before saves a write."""
+    held = DeadbandFilter(Deadband(absolute=1))
+    held.passes(45, 0)
+
+    held.passes(45.5, 60)
+    assert held.held_change
+    held.passes(45.5, 120)
+    assert not held.held_change
+
+
+def test_stats():
+    """Totals, rate and counters per device class."""
+    stats = DeadbandStats()
+    stats.record("temperature", True)
+    stats.record("temperature", False)
+    stats.record("temperature", False)
+    stats.record("humidity", True)
+
+    assert stats.as_dict() == {
+        "passed": 2,
+        "suppressed": 2,
+        "suppressed_rate": 0.5,
+        "sensors": {
+            "humidity": {"passed": 1, "suppressed": 0},
+            "temperature": {"passed": 1, "suppressed": 2},
+        },
+    }
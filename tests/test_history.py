@@ -0,0 +1,61 @@
+"""Tests of the rolling statistics of station readings."""
+import pytest
+
+from history import RollingStats
+
+
+def test_window_statistics():
+    """Mean, min, max and slope per minute of the readings in the window."""
+    stats = RollingStats()
+    for minute, value in enumerate((600, 610, 620, 630)):
+        stats.add(value, 60.0 * minute)
+
+    assert stats.stats("5m") == {
+        "mean": pytest.approx(615),
+        "min": 600,
+        "max": 630,
+        "slope": pytest.approx(10),
+    }
+
+
+def test_old_readings_leave_the_window():
+    """Readings older than the window no longer count for it, but for longer ones."""
+    stats = RollingStats()
+    stats.add(900, 0.0)
+    for minute in range(5, 11):
+        stats.add(500, 60.0 * minute)
+
+    assert stats.stats("5m")["max"] == 500
+    assert stats.stats("15m")["max"] == 900
+
+
+def test_none_readings_skipped():
+    """Unavailable readings are not added."""
+    stats = RollingStats()
+    stats.add(None, 0.0)
+    assert len(stats) == 0
+    assert stats.as_attributes() == {}
+
+    stats.add(21.5, 0.0)
+    assert stats.as_attributes() == {
+        "mean_5m": 21.5,
+        "min_5m": 21.5,
+        "max_5m": 21.5,
+        "mean_15m": 21.5,
+        "min_15m": 21.5,
+        "max_15m": 21.5,
+        "mean_60m": 21.5,
+        "min_60m": 21.5,
+        "max_60m": 21.5,
+    }
+
+
+def test_capacity_bounds_the_history():
+    """A full ring drops the oldest readings from every window."""
+    stats = RollingStats(capacity=4)
+    for second, value in enumerate((100, 1, 2, 3, 4)):
+        stats.add(value, float(second))
+
+    assert len(stats) == 4
+    assert stats.stats("60m")["max"] == 4
+    assert stats.stats("60m")["mean"] == pytest.approx(2.5)
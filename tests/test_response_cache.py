@@ -0,0 +1,237 @@
+"""Tests of the response cache and of sharing identical GETs in flight."""
+import asyncio
+import threading
+import time
+import weakref
+
+import pytest
+
+import mygregorpy
+from mygregorpy import (
+    AsyncMyGregorApi,
+    CircuitBreaker,
+    FakeTransport,
+    MyGregorApi,
+    MyGregorApiBase,
+    RateLimiter,
+    ResponseCache,
+    ServerErrorException,
+)
+
+URL = "http://cloud.test"
+POLICY = (10, 20)
+
+
+class Clock:
+    """Monotonic clock moved by the test."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def no_pacing(monkeypatch):
+    """Limiters without pacing, own breakers and no retries."""
+    monkeypatch.setattr(CircuitBreaker, "_breakers", {})
+    monkeypatch.setattr(RateLimiter, "_limiters", weakref.WeakValueDictionary())
+    monkeypatch.setattr(RateLimiter, "rate", 1e9)
+    monkeypatch.setattr(RateLimiter, "burst", 1e9)
+    monkeypatch.setattr(MyGregorApiBase, "max_retries", 0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the clock of the API module."""
+    clock = Clock()
+    monkeypatch.setattr(mygregorpy, "time", clock)
+    return clock
+
+
+class Counting:
+    """Handler answering every path with the given status and payload, counting."""
+
+    def __init__(self, status=200, payload=None):
+        self.status = status
+        self.payload = {"devices": []} if payload is None else payload
+        self.requests = []
+
+    def __call__(self, method, path, query, data, headers):
+        self.requests.append(f"{method} {path}")
+        return self.status, self.payload, {}
+
+
+def test_fresh_stale_expired(clock):
+    """Fresh entries are hits, stale ones are refreshed by the first caller only."""
+    cache = ResponseCache()
+    cache.put("/v2.1/rooms", {"rooms": []}, POLICY, cache.generation)
+
+    assert cache.get("/v2.1/rooms") == ({"rooms": []}, False)
+    clock.now += 10
+    assert cache.get("/v2.1/rooms") == ({"rooms": []}, True)
+    assert cache.get("/v2.1/rooms") == ({"rooms": []}, False)
+    clock.now += 20
+    assert cache.get("/v2.1/rooms") is None
+    assert len(cache) == 0
+
+
+def test_failed_refresh_retried(clock):
+    """After a failed refresh the next caller of the stale entry tries again."""
+    cache = ResponseCache()
+    cache.put("/v2.1/rooms", {"rooms": []}, POLICY, cache.generation)
+    clock.now += 10
+    assert cache.get("/v2.1/rooms")[1]
+
+    cache.refresh_failed("/v2.1/rooms")
+    assert cache.get("/v2.1/rooms")[1]
+
+
+def test_response_older_than_invalidation_not_stored():
+    """A GET sent before a write does not bring back the old data."""
+    cache = ResponseCache()
+    generation = cache.generation
+    cache.invalidate("/v2.1/rooms")
+    cache.put("/v2.1/rooms", {"rooms": []}, POLICY, generation)
+
+    assert cache.get("/v2.1/rooms") is None
+
+
+def test_invalidate_by_prefix():
+    """Only the endpoints starting with a prefix are dropped."""
+    cache = ResponseCache()
+    for endpoint in ("/v2/devices/1?include=", "/v2/devices/2?include=", "/v2.1/rooms"):
+        cache.put(endpoint, {}, POLICY, cache.generation)
+
+    cache.invalidate("/v2/devices/1?")
+
+    assert cache.get("/v2/devices/1?include=") is None
+    assert cache.get("/v2/devices/2?include=") is not None
+    assert cache.get("/v2.1/rooms") is not None
+
+
+def test_least_recently_used_evicted(monkeypatch):
+    """The entry used longest ago is dropped when the cache is full."""
+    monkeypatch.setattr(ResponseCache, "max_entries", 2)
+    cache = ResponseCache()
+    cache.put("/v2.1/rooms", {}, POLICY, cache.generation)
+    cache.put("/v2/accounts/me", {}, POLICY, cache.generation)
+    cache.get("/v2.1/rooms")
+    cache.put("/v2/devices?include=", {}, POLICY, cache.generation)
+
+    assert cache.get("/v2/accounts/me") is None
+    assert cache.get("/v2.1/rooms") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_live_data_not_cached():
+    """Responses with live readings have no cache policy."""
+    cache = ResponseCache()
+    assert cache.policy("/v2/devices?include=device_data,room_data") is None
+    assert cache.policy("/v2/rooms/1?include=devices") is None
+    assert cache.policy("/v2.1/rooms") is not None
+
+
+def test_client_serves_cache_until_write():
+    """A zone write drops the cached zone list, the next GET asks the API."""
+    handler = Counting(payload={"rooms": [], "id": 1})
+    api = MyGregorApi(base_url=URL, transport=FakeTransport(handler))
+    api.set_access_token("token")
+
+    api.get_zones()
+    api.get_zones()
+    assert handler.requests == ["GET /v2.1/rooms"]
+
+    api.set_zone_state(1, "open")
+    api.get_zones()
+    assert handler.requests == [
+        "GET /v2.1/rooms",
+        "PUT /v2/rooms/1",
+        "GET /v2.1/rooms",
+    ]
+
+
+class Gate(FakeTransport):
+    """Holds every request until the test opens the gate."""
+
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.opened = asyncio.Event()
+
+    async def async_send(self, method, url, data, headers):
+        await self.opened.wait()
+        return await super().async_send(method, url, data, headers)
+
+
+def test_async_identical_gets_share_one_request():
+    """Concurrent identical GETs are sent once and get the same response."""
+    handler = Counting()
+
+    async def run():
+        transport = Gate(handler)
+        api = AsyncMyGregorApi(base_url=URL, transport=transport)
+        api.set_access_token("token")
+        calls = [api.get_devices(include_data=True) for _ in range(3)]
+        calls.append(api.get_device(1))
+        gathered = asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(0)
+        transport.opened.set()
+        results = await gathered
+        return api, results
+
+    api, results = asyncio.run(run())
+
+    assert handler.requests == ["GET /v2/devices", "GET /v2/devices/1"]
+    assert results[:3] == [[], [], []]
+    assert api.single_flight.hits == 2
+    assert api.single_flight.misses == 2
+
+
+def test_async_shared_error_raised_to_every_caller():
+    """The error of the shared request reaches every waiting caller."""
+    handler = Counting(status=500, payload={"message": "down"})
+
+    async def run():
+        api = AsyncMyGregorApi(base_url=URL, transport=FakeTransport(handler))
+        api.set_access_token("token")
+        return await asyncio.gather(
+            *(api.get_devices(include_data=True) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert len(handler.requests) == 1
+    assert all(isinstance(result, ServerErrorException) for result in results)
+
+
+def test_threads_share_one_request():
+    """Identical GETs of several threads are sent once."""
+    opened = threading.Event()
+    handler = Counting()
+
+    def gated(method, path, query, data, headers):
+        opened.wait(5)
+        return handler(method, path, query, data, headers)
+
+    api = MyGregorApi(base_url=URL, transport=FakeTransport(gated))
+    api.set_access_token("token")
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(api.get_devices(include_data=True))
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while api.single_flight.hits < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    opened.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert handler.requests == ["GET /v2/devices"]
+    assert results == [[], [], []]
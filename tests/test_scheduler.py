@@ -0,0 +1,157 @@
+"""Tests of the adaptive per-device polling schedule."""
+from types import SimpleNamespace
+
+import pytest
+
+import scheduler
+from scheduler import (
+    CONFIRM_MARGIN,
+    FAST_INTERVAL,
+    MOVE_TIMEOUT,
+    SLOW_INTERVAL,
+    PollScheduler,
+)
+
+
+class Clock:
+    """Monotonic clock moved by the test."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces the scheduler's clock."""
+    clock = Clock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    return clock
+
+
+def drive(position, state="Online"):
+    """Drive data as fetched."""
+    return SimpleNamespace(unique_id=1, state=state, position=position)
+
+
+def test_new_device_due_then_slow(clock):
+    """A new device is due right away, afterwards every SLOW_INTERVAL."""
+    poller = PollScheduler()
+    poller.observe(drive(50))
+    clock.now += SLOW_INTERVAL - 5
+
+    assert poller.due() == []
+    assert poller.next_delay() == pytest.approx(5)
+
+    clock.now += 5
+    assert poller.due() == [1]
+
+
+def test_due_tolerates_early_timer(clock):
+    """A refresh fired a fraction of a second early still finds its device."""
+    poller = PollScheduler()
+    poller.observe(drive(50))
+    clock.now += SLOW_INTERVAL - 0.5
+
+    assert poller.due() == [1]
+
+
+def test_command_without_speed_polls_fast(clock):
+    """Without a learned speed the drive is due now and then every FAST_INTERVAL."""
+    poller = PollScheduler()
+    poller.observe(drive(0))
+    poller.command_sent(1, 100)
+
+    assert poller.due() == [1]
+    assert poller.is_moving(1)
+
+    clock.now += 1
+    poller.observe(drive(0))
+    assert poller.next_delay() == pytest.approx(FAST_INTERVAL)
+
+    clock.now += FAST_INTERVAL
+    poller.observe(drive(50))
+    # 10 % per second learned, 50 % to go
+    assert poller.next_delay() == pytest.approx(5 + CONFIRM_MARGIN)
+
+
+def test_learned_speed_plans_one_confirming_poll(clock):
+    """With a learned speed the only poll is planned when the move should be over."""
+    poller = PollScheduler()
+    poller.observe(drive(0))
+    poller.command_sent(1, 100)
+    clock.now += 5
+    poller.observe(drive(50))
+    clock.now += 5
+    poller.observe(drive(100))
+    assert not poller.is_moving(1)
+
+    clock.now += 100
+    poller.command_sent(1, 0)
+
+    assert poller.due() == []
+    assert poller.next_delay() == pytest.approx(100 / 10 + CONFIRM_MARGIN)
+    clock.now += 4
+    assert poller.estimate(1) == (60, pytest.approx(6))
+
+
+def test_moving_drive_settles_at_target(clock):
+    """Reaching the target ends the fast polls."""
+    poller = PollScheduler()
+    poller.observe(drive(0))
+    poller.command_sent(1, 100)
+    clock.now += FAST_INTERVAL
+    poller.observe(drive(100))
+
+    assert not poller.is_moving(1)
+    assert poller.moving() == []
+    assert poller.next_delay() == pytest.approx(SLOW_INTERVAL)
+
+
+def test_moving_drive_settles_when_it_stops(clock):
+    """A drive stopped short of its target settles after unchanged polls."""
+    poller = PollScheduler()
+    poller.observe(drive(0))
+    poller.command_sent(1, 100)
+    for position in (30, 30, 30):
+        clock.now += FAST_INTERVAL
+        poller.observe(drive(position))
+
+    assert not poller.is_moving(1)
+
+
+def test_moving_drive_times_out(clock):
+    """A drive that never reports a change settles after MOVE_TIMEOUT."""
+    poller = PollScheduler()
+    poller.observe(drive(0))
+    poller.command_sent(1, 100)
+    clock.now += MOVE_TIMEOUT
+    poller.observe(drive(0))
+
+    assert not poller.is_moving(1)
+
+
+def test_offline_device_polled_with_fleet(clock):
+    """An offline device is listed but polled at the slow interval, no backoff."""
+    poller = PollScheduler()
+    for _ in range(3):
+        poller.observe(drive(None, state="Offline"))
+        clock.now += SLOW_INTERVAL
+
+    assert poller.offline() == [1]
+    assert poller.due() == [1]
+
+    poller.observe(drive(20))
+    assert poller.offline() == []
+
+
+def test_forget(clock):
+    """A forgotten device is no longer scheduled."""
+    poller = PollScheduler()
+    poller.observe(drive(50))
+    poller.forget(1)
+
+    assert poller.due() == []
+    assert poller.next_delay() == SLOW_INTERVAL